@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""Reproducible uhashring benchmark suite.
+
+Measure the ring construction, single and batch lookups, range lookups,
+nodes churn and memory footprint of every runtime across node and vnode
+counts, and write the results as JSON so that they can be compared across
+versions:
+
+    python benchmarks/suite.py --output current.json
+    python benchmarks/suite.py --output current.json --compare baseline.json
+
+When comparing, the exit status is 1 if any timing is slower than the
+baseline by more than the given threshold factor (default 1.25).
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uhashring import HashRing, __version__  # noqa: E402
+
+RUNTIMES = {
+    "meta": {},
+    "meta_md5_64": {"hash_fn": "md5_64"},
+    "ketama": {"hash_fn": "ketama"},
+    "jump": {"algorithm": "jump"},
+    "maglev": {"algorithm": "maglev"},
+}
+# vnodes are only used by the continuum based runtimes
+CONTINUUM_RUNTIMES = ("meta", "meta_md5_64", "ketama")
+
+NODES = (10, 100, 1000)
+VNODES = (40, 160)
+RANGE_SIZES = (1, 3)
+NUM_KEYS = 10000
+REPEAT = 5
+
+QUICK_NODES = (10, 100)
+QUICK_VNODES = (40,)
+QUICK_NUM_KEYS = 1000
+QUICK_REPEAT = 3
+
+
+def best_of(fn, repeat):
+    """Returns the best wall time of the given function over repeat runs."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = perf_counter()
+        fn()
+        timings.append(perf_counter() - start)
+    return min(timings)
+
+
+def make_nodes(num):
+    return {"10.0.{}.{}:11211".format(i // 250, i % 250): 1 for i in range(num)}
+
+
+def bench_ring(runtime, num_nodes, vnodes, keys, repeat):
+    """Yield the (benchmark, unit, value) results of the given ring.
+
+    :param runtime: the RUNTIMES name.
+    :param num_nodes: the number of nodes of the ring.
+    :param vnodes: the number of vnodes per node.
+    :param keys: the keys to look for.
+    :param repeat: the number of runs of every timing, the best is kept.
+    """
+    nodes = make_nodes(num_nodes)
+    kwargs = dict(RUNTIMES[runtime], vnodes=vnodes)
+
+    yield "build", "s", best_of(lambda: HashRing(nodes, **kwargs), repeat)
+
+    gc.collect()
+    tracemalloc.start()
+    ring = HashRing(nodes, **kwargs)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    yield "memory", "bytes", memory
+
+    yield "lookup", "s", best_of(lambda: [ring.get_node(k) for k in keys], repeat) / len(keys)
+    yield "lookup_batch", "s", best_of(lambda: ring.get_nodes_many(keys), repeat) / len(keys)
+    for size in RANGE_SIZES:
+        range_keys = keys[: len(keys) // 10]
+        yield "range_{}".format(size), "s", best_of(
+            lambda: [list(ring.range(k, size)) for k in range_keys], repeat
+        ) / len(range_keys)
+
+    churn = "10.1.0.1:11211"
+
+    def add_remove():
+        ring.add_node(churn)
+        ring.remove_node(churn)
+
+    def reweight():
+        ring.add_node(churn, {"weight": 2})
+        ring.add_node(churn, {"weight": 1})
+
+    yield "churn_add_remove", "s", best_of(add_remove, repeat) / 2
+    ring.add_node(churn)
+    yield "churn_reweight", "s", best_of(reweight, repeat) / 2
+
+
+def run(runtimes=tuple(RUNTIMES), nodes=NODES, vnodes=VNODES, num_keys=NUM_KEYS, repeat=REPEAT):
+    """Run the benchmarks and returns the JSON serializable results.
+
+    :param runtimes: the RUNTIMES names to benchmark.
+    :param nodes: the node counts to benchmark.
+    :param vnodes: the vnode counts to benchmark.
+    :param num_keys: the number of keys looked for.
+    :param repeat: the number of runs of every timing, the best is kept.
+    """
+    keys = ["key-{}".format(i) for i in range(num_keys)]
+    results = []
+    for runtime in runtimes:
+        runtime_vnodes = vnodes if runtime in CONTINUUM_RUNTIMES else vnodes[:1]
+        for num_nodes in nodes:
+            for num_vnodes in runtime_vnodes:
+                params = {"runtime": runtime, "nodes": num_nodes}
+                if runtime in CONTINUUM_RUNTIMES:
+                    params["vnodes"] = num_vnodes
+                for benchmark, unit, value in bench_ring(
+                    runtime, num_nodes, num_vnodes, keys, repeat
+                ):
+                    results.append(
+                        {
+                            "name": benchmark_name(benchmark, params),
+                            "benchmark": benchmark,
+                            "params": params,
+                            "unit": unit,
+                            "value": value,
+                        }
+                    )
+    return {
+        "machine": platform.machine(),
+        "python": "{} {}".format(platform.python_implementation(), platform.python_version()),
+        "results": results,
+        "uhashring": __version__,
+    }
+
+
+def benchmark_name(benchmark, params):
+    return "{}[{}]".format(benchmark, ",".join("{}={}".format(k, v) for k, v in params.items()))
+
+
+def compare(baseline, current, threshold=1.25):
+    """Returns the (name, baseline, current) regressions of the current
+    results, the timings slower than the baseline by more than the given
+    factor.
+
+    :param baseline: the baseline results, see run.
+    :param current: the current results, see run.
+    :param threshold: the slowdown factor to tolerate.
+    """
+    baseline_values = {r["name"]: r["value"] for r in baseline["results"] if r["unit"] == "s"}
+    regressions = []
+    for result in current["results"]:
+        value = baseline_values.get(result["name"])
+        if value and result["value"] > value * threshold:
+            regressions.append((result["name"], value, result["value"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="compare the results to this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--quick", action="store_true", help="run a reduced benchmark matrix")
+    parser.add_argument("--runtime", action="append", choices=sorted(RUNTIMES))
+    args = parser.parse_args(argv)
+
+    kwargs = {"runtimes": args.runtime or tuple(RUNTIMES)}
+    if args.quick:
+        kwargs.update(nodes=QUICK_NODES, vnodes=QUICK_VNODES)
+        kwargs.update(num_keys=QUICK_NUM_KEYS, repeat=QUICK_REPEAT)
+    current = run(**kwargs)
+    for result in current["results"]:
+        if result["unit"] == "s":
+            print("{:<60} {:>12.3f} us".format(result["name"], result["value"] * 1e6))
+        else:
+            print("{:<60} {:>12} {}".format(result["name"], result["value"], result["unit"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for name, before, after in regressions:
+            print("REGRESSION {}: {:.3f} us -> {:.3f} us".format(name, before * 1e6, after * 1e6))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
-"""This is not part of the test suite.
-"""
+"""This is not part of the test suite, see benchmarks/suite.py."""
+
 try:
     import ketama
 except Exception:
@@ -17,8 +17,8 @@ print("running {} key generation comparison".format(num))
 # ketama C binding
 if ketama:
     with NamedTemporaryFile(prefix="benchmark_") as ketama_config_file:
-        ketama_config_file.write("127.0.0.1:11211\t600\n")
-        ketama_config_file.write("127.0.0.1:11212\t400\n")
+        ketama_config_file.write(b"127.0.0.1:11211\t600\n")
+        ketama_config_file.write(b"127.0.0.1:11212\t400\n")
         ketama_config_file.flush()
 
         kt = ketama.Continuum(ketama_config_file.name)
@@ -31,12 +31,29 @@ if ketama:
 # pure python implementation
 ring = HashRing(
     nodes={"127.0.0.1:11211": 600, "127.0.0.1:11212": 400},
+    hash_fn="ketama",
     replicas=4,
     vnodes=40,
-    compat=True,
 )
 pt = time()
 for i in range(num):
     key = "myval-{}".format(i)
     ring.get_server(key)
 print("HashRing took {} s".format(time() - pt))
+
+# consistent hashing runtimes comparison
+nodes = {"127.0.0.1:{}".format(11211 + i): 1 for i in range(100)}
+for name, kwargs in (
+    ("meta", {}),
+    ("ketama", {"hash_fn": "ketama"}),
+    ("jump", {"algorithm": "jump"}),
+    ("maglev", {"algorithm": "maglev"}),
+):
+    pt = time()
+    ring = HashRing(nodes=nodes, **kwargs)
+    print("{} ring of 100 nodes took {} s to build".format(name, time() - pt))
+    pt = time()
+    for i in range(num):
+        key = "myval-{}".format(i)
+        ring.get_node(key)
+    print("{} ring took {} s".format(name, time() - pt))
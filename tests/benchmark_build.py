@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""This is not part of the test suite.
+
+Compare the ketama continuum build time across node counts between the
+legacy insort construction and the current collect-then-sort one.
+"""
+from bisect import insort
+from time import time
+
+from uhashring import HashRing
+
+
+def legacy_create_ring(runtime):
+    """The pre collect-then-sort ketama build, quadratic in points."""
+    _keys = []
+    _ring = {}
+    for node_name, node_conf in runtime._nodes.items():
+        for h in runtime._hashi_weight_generator(node_name, node_conf):
+            _ring[h] = node_name
+            insort(_keys, h)
+    return _keys, _ring
+
+
+print("running ketama continuum build comparison (40 vnodes, 4 replicas)")
+for num in (10, 50, 100, 250, 500, 1000):
+    nodes = {"10.0.{}.{}:11211".format(i // 250, i % 250): 1 for i in range(num)}
+    ring = HashRing(nodes=nodes, hash_fn="ketama")
+
+    pt = time()
+    legacy_keys, legacy_ring = legacy_create_ring(ring.runtime)
+    legacy = time() - pt
+
+    pt = time()
+    ring.regenerate()
+    current = time() - pt
+
+    assert legacy_keys == ring._keys and legacy_ring == ring._ring
+    print(
+        "{} nodes / {} points: insort took {:.4f} s, sort took {:.4f} s".format(
+            num, len(ring._keys), legacy, current
+        )
+    )
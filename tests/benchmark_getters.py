@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""This is not part of the test suite.
+
+Compare the per call time of every getter between the generic _get(key, what)
+lookup and the specialised lookup functions bound to the continuum. The
+time of hashing the key alone is given as the lower bound.
+"""
+
+from timeit import repeat
+
+from uhashring import HashRing
+
+GETTERS = (
+    ("get_node", "nodename"),
+    ("get_node_instance", "instance"),
+    ("get_node_hostname", "hostname"),
+    ("get_node_port", "port"),
+    ("get_node_weight", "weight"),
+    ("get", "dict"),
+    ("get_server", "tuple"),
+)
+NUM = 100000
+
+
+def per_call(fn, keys):
+    best = min(repeat(lambda: [fn(key) for key in keys], number=1, repeat=5))
+    return best / len(keys) * 1e9
+
+
+keys = ["key{}".format(i) for i in range(NUM)]
+nodes = {"10.0.0.{}".format(i): {"port": 11211, "instance": object()} for i in range(100)}
+for hash_fn in (None, "md5_64", "ketama"):
+    ring = HashRing(nodes=nodes, hash_fn=hash_fn)
+    print(
+        "{} ring, {} points, hashing alone: {:.0f} ns".format(
+            hash_fn or "md5", len(ring._keys), per_call(ring.hashi, keys)
+        )
+    )
+    for getter, what in GETTERS:
+        generic = per_call(lambda key: ring._get(key, what), keys)
+        specialised = per_call(getattr(ring, getter), keys)
+        print(
+            "  {:<18} generic {:>5.0f} ns, specialised {:>5.0f} ns".format(
+                getter, generic, specialised
+            )
+        )
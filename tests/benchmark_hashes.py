@@ -4,6 +4,8 @@
 from hashlib import md5, sha1, sha256
 from time import time
 
+from uhashring.hashes import get_hash_fn
+
 num = 1000000
 print("running {} key generation comparison".format(num))
 
@@ -66,3 +68,15 @@ else:
         key = b"myval-%d" % i
         mmh3.hash(b"%s" % key)
     print("MurmurHash v3 took {} s".format(time() - pt))
+
+# uhashring registered hash functions
+for name in ("md5", "md5_64", "blake2b_64", "xxh64", "xxh3_64", "mmh3_32", "mmh3_128"):
+    try:
+        hash_fn = get_hash_fn(name)
+    except ImportError as err:
+        print(err)
+        continue
+    pt = time()
+    for i in range(num):
+        hash_fn(b"myval-%d" % i)
+    print("uhashring {} took {} s".format(name, time() - pt))
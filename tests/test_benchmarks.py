@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+""" """
+
+import json
+
+from benchmarks import suite
+
+
+def test_benchmark_suite(tmp_path):
+    output = tmp_path / "current.json"
+    assert suite.main(["--quick", "--runtime", "jump", "--output", str(output)]) == 0
+    current = json.loads(output.read_text())
+    assert current["python"] and current["uhashring"]
+    benchmarks = {result["benchmark"] for result in current["results"]}
+    assert benchmarks == {
+        "build",
+        "churn_add_remove",
+        "churn_reweight",
+        "lookup",
+        "lookup_batch",
+        "memory",
+        "range_1",
+        "range_3",
+    }
+    assert all(result["value"] > 0 for result in current["results"])
+
+    # regressions are the timings slower than the baseline by the threshold
+    baseline = json.loads(output.read_text())
+    assert suite.compare(baseline, current) == []
+    for result in current["results"]:
+        result["value"] *= 2
+    regressions = suite.compare(baseline, current)
+    # the memory results are not timings
+    assert len(regressions) == len(current["results"]) - 2
+    assert suite.compare(baseline, current, threshold=3) == []
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+from math import ceil
+
+import pytest
+
+from uhashring import HashRing
+
+
+@pytest.fixture(params=[None, "ketama", "jump"])
+def ring(request):
+    nodes = ["node{}".format(i) for i in range(10)]
+    if request.param == "jump":
+        return HashRing(nodes, algorithm="jump", load_factor=1.25)
+    return HashRing(nodes, hash_fn=request.param, load_factor=1.25)
+
+
+def test_bounded_loads(ring):
+    # without load the bounded lookup is the regular one
+    assert ring.get_node_bounded("coconut") == ring.get_node("coconut")
+
+    for i in range(1000):
+        nodename = ring.acquire("key{}".format(i))
+        assert ring.loads[nodename] <= ceil(1.25 * (i + 1) / 10)
+    assert sum(ring.loads.values()) == 1000
+    assert max(ring.loads.values()) <= ceil(1.25 * 1000 / 10)
+
+    for nodename, load in list(ring.loads.items()):
+        for i in range(load):
+            ring.release(nodename)
+    assert sum(ring.loads.values()) == 0
+
+    with pytest.raises(ValueError):
+        ring.release("node1")
+
+
+def test_bounded_loads_overflow(ring):
+    first, second = list(ring.iterate_nodes("coconut"))[:2]
+    ring.set_load(first, 1000)
+    assert ring.get_node_bounded("coconut") == second
+    assert ring.acquire("coconut") == second
+    assert ring.loads[second] == 1
+
+    # removing a node drops its load
+    ring.remove_node(first)
+    assert first not in ring.loads
+    ring.release(second)
+    assert ring.get_node_bounded("coconut") == ring.get_node("coconut")
+
+    with pytest.raises(KeyError):
+        ring.set_load("coconut", 1)
+
+
+def test_bounded_loads_weight():
+    ring = HashRing({"node1": 1, "node2": 3}, load_factor=1)
+    for i in range(400):
+        ring.acquire("key{}".format(i))
+    assert ring.loads == {"node1": 100, "node2": 300}
+
+    assert HashRing().acquire("coconut") is None
+    with pytest.raises(ValueError):
+        HashRing(load_factor=0.5)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+import sys
+import threading
+
+import pytest
+
+from uhashring import HashRing
+
+KEYS = ["key{}".format(i) for i in range(200)]
+NODES = ["node{}".format(i) for i in range(8)]
+
+
+@pytest.fixture
+def switch_interval():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _lookups(ring, stop, errors):
+    try:
+        while not stop.is_set():
+            for key in KEYS:
+                nodename = ring.get_node(key)
+                assert nodename in NODES
+                assert ring.get(key)["nodename"] in NODES
+                position, nodename = ring.get_server(key)
+                assert nodename in NODES
+                assert ring.get_node_weight(key) >= 1
+            for nodename in ring.get_nodes_many(KEYS):
+                assert nodename in NODES
+            nodenames = [node["nodename"] for node in ring.range(KEYS[0])]
+            assert len(nodenames) == len(set(nodenames)) >= 2
+    except Exception as e:  # pragma: no cover
+        errors.append(e)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"hash_fn": "ketama"},
+        {"hash_fn": "md5_64", "compact": True},
+        {"lookup_cache": 64},
+        {"algorithm": "jump"},
+        {"algorithm": "maglev", "table_size": 307},
+        {"lazy": True},
+        {"hash_fn": "ketama", "lazy": True},
+    ],
+)
+def test_lookups_while_nodes_churn(kwargs, switch_interval):
+    ring = HashRing(NODES[:2], vnodes=10, **kwargs)
+    stop = threading.Event()
+    errors = []
+    readers = [threading.Thread(target=_lookups, args=(ring, stop, errors)) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(30):
+            for nodename in NODES[2:]:
+                ring.add_node(nodename, {"weight": i % 3 + 1})
+            ring.add_node(NODES[0], {"weight": i % 2 + 1})
+            for nodename in NODES[2:]:
+                ring.remove_node(nodename)
+            if errors:
+                break
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+    assert not errors, errors[0]
+    # no node change got lost
+    assert set(ring.distribution) == set(ring.nodes)
+    assert ring.distribution == HashRing(dict(ring.nodes), **kwargs).distribution
@@ -3,11 +3,17 @@
 http://techspot.zzzeek.org/2012/07/07/the-absolutely-simplest-consistent-hashing-example/
 """
 
+import zlib
 from collections import Counter
+from hashlib import md5
 from itertools import cycle
 from math import sqrt
 
+import pytest
+
 from uhashring import HashRing
+from uhashring.continuum import Continuum
+from uhashring.ownership import get_ownership, get_shares
 
 
 def _pop_std_dev(population):
@@ -45,3 +51,91 @@ def test_distribution():
     # just to test getting keys, see that we got the values
     # back and not keys or indexes or whatever.
     assert set(distribution.keys()) == set("node_value{}".format(i) for i in range(1, 1 + numnodes))
+
+
+def test_ownership_wraparound():
+    nodes = {"node1": {"weight": 1}, "node2": {"weight": 1}}
+    continuum = Continuum([10, 20, 90], {10: "node1", 20: "node2", 90: "node2"}, nodes, Counter())
+    # node1 owns [0, 10) and the [90, 100) wrap arc
+    assert get_shares(continuum, 100) == {"node1": 0.2, "node2": 0.8}
+    ownership = get_ownership(continuum, 100)
+    assert ownership.imbalance == pytest.approx(1.6)
+    assert ownership.stddev == pytest.approx(0.6)
+    assert ownership.keyspace == 100
+
+
+@pytest.mark.parametrize(
+    "kwargs, bits",
+    [({}, 128), ({"hash_fn": "ketama"}, 32), ({"hash_fn": "md5_64", "compact": True}, 64)],
+)
+def test_ownership(kwargs, bits):
+    nodes = {"node{}".format(i): 1 for i in range(1, 6)}
+    nodes["node6"] = 2
+    ring = HashRing(nodes, **kwargs)
+    ownership = ring.get_ownership()
+    assert ownership.keyspace == 1 << bits
+    assert set(ownership.shares) == set(nodes)
+    assert sum(ownership.shares.values()) == pytest.approx(1)
+    assert ownership.imbalance >= 1
+    assert ownership.stddev > 0
+
+    # the exact shares match the sampled ones
+    numkeys = 20000
+    sampled = Counter(ring.get_nodes_many(str(i) for i in range(numkeys)))
+    for nodename, share in ownership.shares.items():
+        assert sampled[nodename] / numkeys == pytest.approx(share, abs=0.01)
+
+
+def _signed_hash(key):
+    # a signed 32 bits hash like mmh3.hash
+    return int.from_bytes(md5(str(key).encode("utf-8")).digest()[:4], "little", signed=True)
+
+
+def test_ownership_signed_hash():
+    nodes = ["node1", "node2", "node3"]
+    ring = HashRing(nodes, hash_fn=_signed_hash)
+    assert ring._keys[0] < 0 < ring._keys[-1]
+    ownership = ring.get_ownership()
+    assert ownership.keyspace == 1 << 32
+    assert sum(ownership.shares.values()) == pytest.approx(1)
+
+    numkeys = 20000
+    sampled = Counter(ring.get_nodes_many(str(i) for i in range(numkeys)))
+    for nodename, share in ownership.shares.items():
+        assert sampled[nodename] / numkeys == pytest.approx(share, abs=0.01)
+    assert ownership.imbalance < 1.2
+
+    # only negative points
+    ring = HashRing(nodes, hash_fn=lambda key: -1 - zlib.crc32(str(key).encode("utf-8")))
+    ownership = ring.get_ownership()
+    assert ownership.keyspace == 1 << 64
+    assert sum(ownership.shares.values()) == pytest.approx(1)
+
+
+def test_ownership_positions():
+    ring = HashRing({"node1": 1, "node2": 3}, algorithm="jump")
+    ownership = ring.get_ownership()
+    assert ownership.shares == {"node1": 0.25, "node2": 0.75}
+    assert ownership.imbalance == 1
+    assert ownership.stddev == 0
+
+    ring = HashRing(["node1", "node2", "node3"], algorithm="maglev", table_size=307)
+    ownership = ring.get_ownership()
+    assert ownership.keyspace == 307
+    assert sum(ownership.shares.values()) == pytest.approx(1)
+    assert ownership.imbalance < 1.01
+
+
+def test_recommend_vnodes():
+    nodes = ["node{}".format(i) for i in range(10)]
+    ring = HashRing(nodes, hash_fn="ketama")
+    vnodes = ring.recommend_vnodes(1.1)
+    assert HashRing(nodes, hash_fn="ketama", vnodes=vnodes).get_ownership().imbalance <= 1.1
+    assert ring.recommend_vnodes(1.1, max_vnodes=vnodes) == vnodes
+
+    with pytest.raises(ValueError):
+        ring.recommend_vnodes(1.0001, max_vnodes=8)
+    with pytest.raises(ValueError):
+        ring.recommend_vnodes(0.5)
+    with pytest.raises(ValueError):
+        HashRing(nodes, algorithm="jump").recommend_vnodes(1.1)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+import pytest
+
+from uhashring import HashRing
+
+
+@pytest.fixture(
+    params=[
+        {},
+        {"hash_fn": "ketama"},
+        {"hash_fn": "md5_64", "compact": True},
+        {"lookup_cache": 64},
+        {"metrics": True},
+        {"preference_list": 2},
+        {"algorithm": "jump"},
+        {"algorithm": "maglev", "table_size": 307},
+    ]
+)
+def ring(request):
+    return HashRing(["node{}".format(i) for i in range(1, 6)], **request.param)
+
+
+def test_mark_down(ring):
+    keys = ["key{}".format(i) for i in range(1000)]
+    before = {key: ring.get_node(key) for key in keys}
+    preference = {key: [n["nodename"] for n in ring.range(key, 3)] for key in keys}
+    continuum = ring.runtime._continuum
+
+    ring.mark_down("node1")
+    ring.mark_down("node2")
+    assert ring.down_nodes == {"node1", "node2"}
+    # the continuum is left untouched
+    assert ring.runtime._continuum is continuum
+
+    for key in keys:
+        live = [n for n in preference[key] if n not in ("node1", "node2")]
+        nodename = ring.get_node(key)
+        if before[key] not in ("node1", "node2"):
+            assert nodename == before[key]
+        elif preference[key][1] not in ("node1", "node2"):
+            # the next distinct live owner
+            assert nodename == live[0]
+        assert nodename not in ("node1", "node2")
+        assert ring.get(key)["nodename"] == nodename
+        assert ring.get_server(key)[1] == nodename
+        assert [n["nodename"] for n in ring.range(key)][0] == nodename
+        assert "node1" not in [n["nodename"] for n in ring.range(key)]
+    assert ring.get_nodes_many(keys) == [ring.get_node(key) for key in keys]
+
+    # marking up restores exactly the original mapping
+    ring.mark_up("node1")
+    ring.mark_up("node2")
+    assert ring.down_nodes == frozenset()
+    assert {key: ring.get_node(key) for key in keys} == before
+    assert {key: [n["nodename"] for n in ring.range(key, 3)] for key in keys} == preference
+
+
+def test_mark_down_all(ring):
+    for nodename in list(ring.nodes):
+        ring.mark_down(nodename)
+    assert ring.get_node("coconut") is None
+    assert ring.get("coconut") is None
+    assert ring.get_server("coconut") is None
+    assert ring.get_nodes_many(["coconut"]) == [None]
+    assert list(ring.range("coconut")) == []
+
+    ring.mark_up("node3")
+    assert ring.get_node("coconut") == "node3"
+
+
+def test_mark_down_changes(ring):
+    ring.mark_down("node1")
+    ring.add_node("node6")
+    assert "node1" not in ring.get_nodes_many(["key{}".format(i) for i in range(1000)])
+
+    # removed nodes are not down anymore
+    ring.remove_node("node1")
+    assert ring.down_nodes == frozenset()
+
+    with pytest.raises(KeyError):
+        ring.mark_down("node1")
+    # marking up a node which is not down is a no-op
+    ring.mark_up("node2")
@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
 """
 """
+import subprocess
 import sys
+import tracemalloc
 import types
+import zlib
+from array import array
 from collections import Counter
 from uuid import uuid4
 
 import pytest
 
-from uhashring import HashRing
+from uhashring import HashRing, hashes, register_hash_fn
+from uhashring.hashes import get_hash_fn
 
 PY3 = sys.version_info >= (3,)
 
@@ -243,3 +248,350 @@ def test_ketama_replica_arg():
     ring = HashRing([1, 2, 3, 4], hash_fn="ketama", replicas=3)
     assert ring.runtime._replicas == 3
     assert ring.get_node("foo") == 4
+
+
+@pytest.mark.parametrize("hash_fn", [None, "ketama"])
+def test_get_nodes_many(hash_fn):
+    ring = HashRing(nodes={"node1": 1, "node2": 2, "node3": 1}, hash_fn=hash_fn)
+    keys = ["key{}".format(i) for i in range(1000)] + [uuid4()]
+
+    assert ring.get_nodes_many(keys) == [ring.get_node(k) for k in keys]
+    assert ring.get_nodes_many(keys, "tuple") == [ring.get_server(k) for k in keys]
+    assert ring.get_nodes_many(keys, "pos") == [ring.get_node_pos(k) for k in keys]
+    assert ring.get_nodes_many(keys, "weight") == [ring.get_node_weight(k) for k in keys]
+    assert ring.get_nodes_many(keys, "dict") == [ring.get(k) for k in keys]
+    assert ring.get_nodes_many(iter(keys[:10])) == [ring.get_node(k) for k in keys[:10]]
+
+    with pytest.raises(ValueError):
+        ring.get_nodes_many(keys, "coconut")
+
+    # the continuum change must be seen by the batch lookups
+    ring.remove_node("node2")
+    assert ring.get_nodes_many(keys) == [ring.get_node(k) for k in keys]
+
+    assert HashRing().get_nodes_many(["a", "b"]) == [None, None]
+
+
+@pytest.mark.parametrize("hash_fn", [None, "ketama"])
+def test_get_nodes_many_without_numpy(hash_fn, monkeypatch):
+    # importing a module set to None in sys.modules raises ImportError
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    ring = HashRing(nodes={"node1": 1, "node2": 1, "node3": 1}, hash_fn=hash_fn)
+    keys = ["key{}".format(i) for i in range(1000)]
+
+    assert ring.get_nodes_many(keys) == [ring.get_node(k) for k in keys]
+    assert ring.get_nodes_many(keys, "tuple") == [ring.get_server(k) for k in keys]
+
+
+def _signed_crc32(key):
+    return zlib.crc32(str(key).encode("utf-8")) - 2**31
+
+
+def test_get_nodes_many_signed_hash():
+    # older numpy releases silently wrap negative values to uint64 so the
+    # batch lookups must not rely on numpy raising for signed keyspaces
+    ring = HashRing(nodes={"node1": 1, "node2": 2, "node3": 1}, hash_fn=_signed_crc32)
+    keys = ["key{}".format(i) for i in range(1000)]
+    assert ring._keys[0] < 0
+    assert ring._get_np_points(ring._keys) is None
+
+    assert ring.get_nodes_many(keys) == [ring.get_node(k) for k in keys]
+    assert ring.get_nodes_many(keys, "tuple") == [ring.get_server(k) for k in keys]
+    assert ring.get_nodes_many(keys, "pos") == [ring.get_node_pos(k) for k in keys]
+
+
+def test_import_is_lazy():
+    # the optional and multiprocessing modules are only imported on first use
+    modules = ["numpy", "multiprocessing", "concurrent.futures"]
+    code = "import sys, uhashring; print([m for m in {!r} if m in sys.modules])".format(modules)
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.strip() == "[]"
+
+
+def _assert_ketama_rebuilt(ring):
+    fresh = HashRing(hash_fn="ketama")
+    for nodename, conf in ring.nodes.items():
+        fresh.runtime._nodes[nodename] = dict(conf)
+    fresh.regenerate()
+    assert ring._keys == fresh._keys
+    assert ring._ring == fresh._ring
+    assert ring.distribution == fresh.distribution
+
+
+def test_ketama_incremental_update(monkeypatch):
+    ring = HashRing(nodes={"node{}".format(i): 1 for i in range(10)}, hash_fn="ketama")
+
+    def _create_ring(nodes):
+        raise AssertionError("unexpected full ring rebuild")
+
+    # same weights: adding or removing a node only hashes its own points
+    monkeypatch.setattr(ring.runtime, "_create_ring", _create_ring)
+    ring.add_node("node10")
+    _assert_ketama_rebuilt(ring)
+    ring.remove_node("node3")
+    _assert_ketama_rebuilt(ring)
+    monkeypatch.undo()
+
+    # reweight / heterogeneous weights move points of every node
+    ring.add_node("node4", {"weight": 5})
+    _assert_ketama_rebuilt(ring)
+    ring.add_node("node11", {"weight": 3, "vnodes": 10})
+    _assert_ketama_rebuilt(ring)
+    ring.remove_node("node4")
+    _assert_ketama_rebuilt(ring)
+    for nodename in list(ring.nodes):
+        ring.remove_node(nodename)
+    assert ring._keys == [] and ring.ring == {} and not ring.distribution
+
+
+@pytest.mark.parametrize("hash_fn", [None, "ketama"])
+def test_compact_ring(hash_fn):
+    nodes = {"node1": 1, "node2": 2, "node3": 1}
+    ring = HashRing(nodes=nodes, hash_fn=hash_fn)
+    compact_ring = HashRing(nodes=nodes, hash_fn=hash_fn, compact=True)
+    keys = ["key{}".format(i) for i in range(1000)]
+
+    def assert_same_continuum():
+        assert compact_ring.size == ring.size
+        assert compact_ring.ring == ring.ring
+        assert compact_ring.continuum == ring.continuum
+        assert compact_ring.get_points() == ring.get_points()
+        assert compact_ring.distribution == ring.distribution
+        assert [compact_ring.get_server(k) for k in keys] == [ring.get_server(k) for k in keys]
+        assert compact_ring.get_nodes_many(keys) == ring.get_nodes_many(keys)
+        assert list(compact_ring.range("test")) == list(ring.range("test"))
+
+    assert_same_continuum()
+    assert not isinstance(compact_ring.ring, dict)
+    if hash_fn == "ketama":
+        assert isinstance(compact_ring._keys, array)
+
+    for r in (ring, compact_ring):
+        r.add_node("node4", {"weight": 3})
+        r.remove_node("node1")
+    assert_same_continuum()
+
+    for r in (ring, compact_ring):
+        r.remove_node("node2")
+        r.remove_node("node3")
+        r.remove_node("node4")
+    assert compact_ring.ring == {} and len(compact_ring._keys) == 0
+    assert compact_ring.get_node("test") is None
+
+
+def test_lookup_owners_memory():
+    ring = HashRing(["node{}".format(i) for i in range(300)], hash_fn="ketama", compact=True)
+    numpoints = len(ring._keys)
+    tracemalloc.start()
+    try:
+        ring.get_node("coconut")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # the owners of 300 nodes are stored in 2 bytes per position
+    assert peak < numpoints * 4
+    assert [ring.get_server(k) for k in range(1000)] == [ring._get(k, "tuple") for k in range(1000)]
+
+
+def test_md5_64_hash_fn():
+    nodes = ["node{}".format(i) for i in range(10)]
+    ring = HashRing(nodes)
+    ring_64 = HashRing(nodes, hash_fn="md5_64")
+    assert ring_64.hashi("test") == ring.hashi("test") >> 64 == 688887797400064883
+    assert ring_64.size == ring.size
+
+    # the order of the continuum is kept, no key move when migrating
+    keys = ["key{}".format(i) for i in range(10000)]
+    assert ring_64.count_moved_keys(ring, keys) == 0
+    assert ring_64.count_moved_keys(HashRing(nodes[:-1]), keys) > 0
+
+    compact_ring = HashRing(nodes, hash_fn="md5_64", compact=True)
+    assert isinstance(compact_ring._keys, array)
+    assert compact_ring.get_nodes_many(keys) == ring_64.get_nodes_many(keys)
+
+    with pytest.raises(ValueError):
+        HashRing(nodes, hash_fn="md5_42")
+
+
+@pytest.mark.parametrize("hash_fn", ["md5", "md5_64", "blake2b_64", "xxh3_64", "mmh3_128"])
+def test_named_hash_fn(hash_fn):
+    try:
+        fn = get_hash_fn(hash_fn)
+    except ImportError:
+        pytest.skip("{} hash function package not installed".format(hash_fn))
+
+    ring = HashRing(["node1", "node2", "node3"], hash_fn=hash_fn)
+    assert ring.hashi("coconut") == fn("coconut")
+    assert ring.hashi(b"coconut") == fn(b"coconut")
+    assert isinstance(ring.hashi("coconut"), int)
+    assert ring.size == 3 * 160
+    assert set(ring.get_nodes_many(range(100))) == {"node1", "node2", "node3"}
+
+
+def test_register_hash_fn(monkeypatch):
+    # the registrations of this test must not leak into the other tests
+    monkeypatch.setattr(hashes, "_hash_functions", dict(hashes._hash_functions))
+    monkeypatch.setattr(hashes, "_hash_bits", dict(hashes._hash_bits))
+
+    def crc_hash(key):
+        return zlib.crc32(str(key).encode("utf-8"))
+
+    register_hash_fn("crc32", crc_hash)
+    ring = HashRing(["node1", "node2"], hash_fn="crc32")
+    assert ring.hashi("coconut") == crc_hash("coconut")
+
+    with pytest.raises(TypeError):
+        register_hash_fn("coconut", 42)
+
+    with pytest.raises(ValueError):
+        register_hash_fn("ketama", crc_hash)
+
+    # the keyspace width of a known hash function can't go stale
+    with pytest.raises(ValueError):
+        register_hash_fn("md5_64", crc_hash)
+    assert hashes.get_hash_fn("md5_64") is hashes.md5_64
+    register_hash_fn("md5_64", crc_hash, bits=32)
+    assert hashes.get_hash_bits("md5_64") == 32
+    ring = HashRing(["node1", "node2"], hash_fn="md5_64")
+    assert ring.plan_moves(HashRing(["node1"], hash_fn="md5_64")).keyspace == 1 << 32
+
+
+@pytest.mark.parametrize("hash_fn", [None, "ketama"])
+def test_lookup_cache(hash_fn):
+    nodes = {"node1": 1, "node2": 1, "node3": 1}
+    ring = HashRing(nodes=nodes, hash_fn=hash_fn)
+    cached_ring = HashRing(nodes=nodes, hash_fn=hash_fn, lookup_cache=100)
+    keys = ["key{}".format(i) for i in range(50)]
+
+    assert ring.lookup_cache_info is None
+    assert [cached_ring.get_server(k) for k in keys] == [ring.get_server(k) for k in keys]
+    assert [cached_ring.get_node(k) for k in keys] == [ring.get_node(k) for k in keys]
+    info = cached_ring.lookup_cache_info
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (50, 50, 100, 50)
+
+    # every continuum change invalidates the cache
+    for r in (ring, cached_ring):
+        r.remove_node("node2")
+    assert [cached_ring.get_node(k) for k in keys] == [ring.get_node(k) for k in keys]
+    for r in (ring, cached_ring):
+        r.add_node("node4", {"weight": 2})
+    assert [cached_ring.get_node(k) for k in keys] == [ring.get_node(k) for k in keys]
+    cached_ring.regenerate()
+    assert [cached_ring.get_node(k) for k in keys] == [ring.get_node(k) for k in keys]
+    info = cached_ring.lookup_cache_info
+    assert (info.hits, info.misses, info.currsize) == (50, 200, 50)
+
+    # LRU eviction and unhashable keys
+    assert [cached_ring.get_node(str(i)) for i in range(200)] == [
+        ring.get_node(str(i)) for i in range(200)
+    ]
+    assert cached_ring.lookup_cache_info.currsize == 100
+    assert cached_ring.get_node(["coconut"]) == ring.get_node(["coconut"])
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_meta_ring_reweight(compact):
+    ring = HashRing(nodes={"node1": 3, "node2": 1}, hash_fn="md5_64", compact=compact)
+    published = ring.runtime._continuum
+
+    # lowering a weight removes the extra points of the node
+    ring.add_node("node1", {"weight": 1})
+    fresh = HashRing(nodes={"node1": 1, "node2": 1}, hash_fn="md5_64", compact=compact)
+    assert list(ring._keys) == list(fresh._keys)
+    assert dict(ring.ring) == dict(fresh.ring)
+    assert ring.distribution == fresh.distribution == {"node1": 160, "node2": 160}
+
+    # published continuums are never changed
+    assert published.distribution == {"node1": 480, "node2": 160}
+    assert len(published.keys) == 640 and published.nodes["node1"]["weight"] == 3
+
+    ring.add_node("node1", {"weight": 3})
+    assert list(ring._keys) == list(published.keys)
+    assert dict(ring.ring) == dict(published.ring)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"hash_fn": "ketama"}, {"hash_fn": "md5_64", "compact": True}, {"algorithm": "jump"}],
+)
+def test_preference_list(kwargs):
+    nodes = {"node{}".format(i): i % 3 + 1 for i in range(6)}
+    ring = HashRing(nodes=nodes, vnodes=20, **kwargs)
+    preference_ring = HashRing(nodes=nodes, vnodes=20, preference_list=3, **kwargs)
+    keys = ["key{}".format(i) for i in range(300)]
+
+    def _assert_same_ranges():
+        for key in keys:
+            for size in (None, 1, 2, 3, 4):
+                assert list(preference_ring.range(key, size)) == list(ring.range(key, size))
+            assert list(preference_ring.iterate_nodes(key)) == list(ring.iterate_nodes(key))
+            assert list(preference_ring.range(key, unique=False)) == list(
+                ring.range(key, unique=False)
+            )
+
+    _assert_same_ranges()
+    table = preference_ring._preference_table[1]
+    assert len(table._table) == len(preference_ring._keys) * 3
+
+    # the table is rebuilt after every continuum change
+    for r in (ring, preference_ring):
+        r.remove_node("node1")
+        r.add_node("node6", {"weight": 2})
+    _assert_same_ranges()
+    assert preference_ring._preference_table[1] is not table
+
+    # less owners than the preference list size
+    for r in (ring, preference_ring):
+        for nodename in list(r.nodes)[1:]:
+            r.remove_node(nodename)
+    _assert_same_ranges()
+    assert [len(list(preference_ring.range(key))) for key in keys] == [1] * len(keys)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"hash_fn": "ketama"},
+        {"hash_fn": "md5_64", "compact": True},
+        {"lookup_cache": 10},
+        {"algorithm": "jump"},
+        {"algorithm": "maglev", "table_size": 307},
+    ],
+)
+def test_specialised_getters(kwargs):
+    nodes = {
+        "node{}".format(i): {"hostname": "host{}".format(i), "port": i, "weight": i % 2 + 1}
+        for i in range(5)
+    }
+    ring = HashRing(nodes=nodes, **kwargs)
+    keys = ["key{}".format(i) for i in range(200)]
+    getters = (
+        (ring.get_node, "nodename"),
+        (ring.get_node_instance, "instance"),
+        (ring.get_node_hostname, "hostname"),
+        (ring.get_node_port, "port"),
+        (ring.get_node_weight, "weight"),
+        (ring.get, "dict"),
+    )
+
+    def _assert_same_lookups():
+        for getter, what in getters:
+            assert [getter(k) for k in keys] == [ring._get(k, what) for k in keys]
+
+    _assert_same_lookups()
+    assert ring[keys[0]] is None
+
+    # the node instance and port are updated without changing the continuum
+    nodename = ring.get_node(keys[0])
+    continuum = ring.runtime._continuum
+    ring.add_node(nodename, dict(nodes[nodename], instance="instance", port=11211))
+    assert ring.runtime._continuum.keys is continuum.keys
+    assert ring[keys[0]] == "instance" and ring.get_node_port(keys[0]) == 11211
+    _assert_same_lookups()
+
+    ring.remove_node(nodename)
+    _assert_same_lookups()
+    for nodename in list(ring.nodes):
+        ring.remove_node(nodename)
+    assert [getter(keys[0]) for getter, what in getters] == [None] * len(getters)
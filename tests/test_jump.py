@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+from collections import Counter
+
+import pytest
+
+from uhashring import HashRing
+from uhashring.ring_jump import jump_hash
+
+KEYS = ["key{}".format(i) for i in range(10000)]
+
+
+@pytest.fixture
+def ring():
+    ring = HashRing(nodes=["node{}".format(i) for i in range(10)], algorithm="jump")
+    return ring
+
+
+def _mapping(ring):
+    return dict(zip(KEYS, ring.get_nodes_many(KEYS)))
+
+
+def test_jump_hash():
+    for key in range(1000):
+        assert jump_hash(key, 1) == 0
+        for num_buckets in range(1, 50):
+            bucket = jump_hash(key, num_buckets + 1)
+            assert bucket in (jump_hash(key, num_buckets), num_buckets)
+    assert jump_hash(2**64 + 42, 10) == jump_hash(42, 10)
+
+
+def test_jump_ring(ring):
+    assert ring.size == 10
+    assert ring.distribution == Counter({"node{}".format(i): 1 for i in range(10)})
+    assert ring.get_nodes_many(KEYS) == [ring.get_node(k) for k in KEYS]
+    assert ring.get_nodes_many(KEYS, "pos") == [ring.get_node_pos(k) for k in KEYS]
+    assert ring.get_server("coconut") == (ring.get_node_pos("coconut"), ring.get_node("coconut"))
+
+    # perfect balance
+    distribution = Counter(ring.get_nodes_many(KEYS))
+    assert len(distribution) == 10
+    assert max(distribution.values()) < 1100
+
+    nodes = list(ring.iterate_nodes("coconut"))
+    assert nodes[0] == ring.get_node("coconut")
+    assert sorted(nodes) == sorted(ring.nodes)
+    assert len(list(ring.range("coconut", size=3))) == 3
+
+    cached_ring = HashRing(nodes=list(ring.nodes), algorithm="jump", lookup_cache=100)
+    assert [cached_ring.get_node(k) for k in KEYS] == ring.get_nodes_many(KEYS)
+
+    assert HashRing(algorithm="jump").get_node("coconut") is None
+    with pytest.raises(ValueError):
+        HashRing(algorithm="coconut")
+
+
+def test_jump_ring_weight():
+    ring = HashRing(nodes={"node1": 1, "node2": 3}, algorithm="jump")
+    assert ring.size == 4
+    assert ring.distribution == Counter({"node1": 1, "node2": 3})
+    distribution = Counter(ring.get_nodes_many(KEYS))
+    assert 2300 < distribution["node1"] < 2700
+
+
+def test_jump_ring_add_node(ring):
+    before = _mapping(ring)
+    ring.add_node("node10")
+    after = _mapping(ring)
+
+    # only keys moving to the new node move
+    moved = [k for k in KEYS if before[k] != after[k]]
+    assert all(after[k] == "node10" for k in moved)
+    assert 700 < len(moved) < 1100
+
+
+def test_jump_ring_remove_tail_node(ring):
+    before = _mapping(ring)
+    ring.remove_node("node9")
+    after = _mapping(ring)
+
+    # only the keys of the removed node move
+    moved = [k for k in KEYS if before[k] != after[k]]
+    assert all(before[k] == "node9" for k in moved)
+    assert len(moved) == sum(1 for k in KEYS if before[k] == "node9")
+
+
+def test_jump_ring_remove_node(ring):
+    before = _mapping(ring)
+    ring.remove_node("node3")
+    after = _mapping(ring)
+
+    # the removed node and the tail bucket node keys move
+    assert "node3" not in after.values()
+    moved = [k for k in KEYS if before[k] != after[k]]
+    assert all(before[k] in ("node3", "node9") for k in moved)
+    assert all(after[k] == "node9" for k in KEYS if before[k] == "node3")
+
+    ring.add_node("node3", {"weight": 2})
+    ring.add_node("node3", {"weight": 1})
+    assert ring.distribution["node3"] == 1 and ring.size == 10
+    for nodename in list(ring.nodes):
+        ring.remove_node(nodename)
+    assert ring.size == 0 and ring.get_node("coconut") is None
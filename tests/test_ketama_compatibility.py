@@ -56,3 +56,20 @@ def test_ketama_compatibility(ketama_config_file):
     for i in range(numhits):
         key = str(randint(1, numvalues))
         assert ring.get_server(key) == continuum.get_server(key)
+
+
+@pytest.mark.parametrize("replicas", [1, 3, 4])
+def test_ketama_single_digest_points(replicas):
+    ring = HashRing(
+        nodes={"127.0.0.1:11211": 600, "127.0.0.1:11212": 400, "127.0.0.1:11213": 50},
+        replicas=replicas,
+        vnodes=40,
+        hash_fn="ketama",
+    )
+    runtime = ring.runtime
+    for node_name, node_conf in runtime._nodes.items():
+        ks = runtime._distribution[node_name] // replicas
+        legacy_points = [
+            runtime.hashi(f"{node_name}-{w}", replica=i) for w in range(ks) for i in range(replicas)
+        ]
+        assert list(runtime._hashi_weight_generator(node_name, node_conf)) == legacy_points
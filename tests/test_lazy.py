@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+import sys
+from threading import Barrier, Event, Thread
+
+import pytest
+
+from uhashring import HashRing
+
+
+@pytest.fixture(
+    params=[
+        {},
+        {"hash_fn": "ketama"},
+        {"hash_fn": "md5_64", "compact": True},
+        {"algorithm": "jump"},
+        {"algorithm": "maglev", "table_size": 307},
+    ]
+)
+def kwargs(request):
+    return request.param
+
+
+def _changes(ring):
+    ring.add_node("node6", {"weight": 2})
+    ring.remove_node("node1")
+    ring.add_node("node2", {"weight": 3})
+    ring.add_node("node7")
+    ring.remove_node("node7")
+    ring.add_node("node1")
+
+
+def test_lazy(kwargs):
+    events = []
+    nodes = ["node{}".format(i) for i in range(1, 6)]
+    ring = HashRing(nodes, lazy=True, on_rebuild=events.append, **kwargs)
+    assert events == []
+    assert len(ring.runtime._builder._continuum.keys) == 0
+
+    expected = HashRing(nodes, **kwargs)
+    keys = ["key{}".format(i) for i in range(1000)]
+    assert ring.get_nodes_many(keys) == expected.get_nodes_many(keys)
+    assert [e.operation for e in events] == ["create_ring"]
+
+    # consecutive changes are coalesced into a single build
+    _changes(ring)
+    _changes(expected)
+    assert len(events) == 1
+    assert ring.get_node("coconut") is not None
+    assert [e.operation for e in events] == ["create_ring", "update_ring"]
+    assert ring.distribution == expected.distribution
+    # the jump buckets order depends on the history of the changes
+    if kwargs.get("algorithm") != "jump":
+        assert ring.get_nodes_many(keys) == expected.get_nodes_many(keys)
+    if "algorithm" not in kwargs:
+        assert ring.get_points() == expected.get_points()
+
+    # the nodes configuration is not deferred
+    ring.update(remove=["node2"])
+    assert "node2" not in ring.nodes
+    with pytest.raises(KeyError):
+        ring.remove_node("node2")
+    assert "node2" not in ring.get_nodes_many(keys)
+
+
+def test_lazy_instance():
+    ring = HashRing(["node1"], lazy=True)
+    ring.add_node("node1", {"instance": "instance1"})
+    assert ring.get_node_instance("coconut") == "instance1"
+    ring.add_node("node1", {"instance": "instance2"})
+    assert ring.get_node_instance("coconut") == "instance2"
+
+
+def test_lazy_snapshot(tmp_path):
+    ring = HashRing(["node1", "node2"], hash_fn="ketama", lazy=True)
+    path = str(tmp_path / "ring.snapshot")
+    ring.save_snapshot(path)
+    assert HashRing.from_snapshot(path).get_points() == ring.get_points()
+    assert ring.plan_moves(["node1"]).moved
+
+
+def test_lazy_threads():
+    events = []
+    ring = HashRing(["node{}".format(i) for i in range(50)], lazy=True, on_rebuild=events.append)
+    barrier = Barrier(8)
+    results = []
+
+    def lookup():
+        barrier.wait()
+        results.append(ring.get_node("coconut"))
+
+    threads = [Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(events) == 1
+    assert len(set(results)) == 1 and results[0] is not None
+
+
+def test_lazy_lookups_while_nodes_change():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(3):
+            ring = HashRing(["node{}".format(i) for i in range(50)], lazy=True)
+            stop = Event()
+            errors = []
+
+            def lookups():
+                while not stop.is_set():
+                    try:
+                        ring.get_node("coconut")
+                    except Exception as e:  # pragma: no cover
+                        errors.append(e)
+
+            thread = Thread(target=lookups)
+            thread.start()
+            for i in range(50, 80):
+                ring.add_node("node{}".format(i))
+            stop.set()
+            thread.join()
+            assert not errors, errors[0]
+            # no node change got lost
+            assert set(ring.distribution) == set(ring.nodes)
+    finally:
+        sys.setswitchinterval(interval)
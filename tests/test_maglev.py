@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+from collections import Counter
+
+import pytest
+
+from uhashring import HashRing
+
+KEYS = ["key{}".format(i) for i in range(10000)]
+
+
+@pytest.fixture
+def ring():
+    ring = HashRing(nodes=["node{}".format(i) for i in range(10)], algorithm="maglev")
+    return ring
+
+
+def test_maglev_ring(ring):
+    assert ring.size == 65537
+    assert ring.disruption == 1.0
+    assert set(ring.distribution) == set(ring.nodes)
+    # every node fills its share of the table
+    assert max(ring.distribution.values()) - min(ring.distribution.values()) <= 1
+
+    assert ring.get_nodes_many(KEYS) == [ring.get_node(k) for k in KEYS]
+    assert ring.get_node_pos("coconut") == ring.hashi("coconut") % 65537
+    assert ring.get_server("coconut") == (ring.get_node_pos("coconut"), ring.get_node("coconut"))
+
+    nodes = list(ring.iterate_nodes("coconut"))
+    assert nodes[0] == ring.get_node("coconut")
+    assert sorted(nodes) == sorted(ring.nodes)
+
+    assert HashRing(algorithm="maglev").get_node("coconut") is None
+    assert HashRing().disruption is None
+    with pytest.raises(ValueError):
+        HashRing(algorithm="maglev", table_size=65536)
+
+
+def test_maglev_ring_weight():
+    ring = HashRing(nodes={"node1": 1, "node2": 3}, algorithm="maglev", table_size=1009)
+    assert ring.size == 1009
+    assert abs(ring.distribution["node2"] - 3 * ring.distribution["node1"]) <= 3
+    distribution = Counter(ring.get_nodes_many(KEYS))
+    assert 2200 < distribution["node1"] < 2800
+
+
+def test_maglev_ring_disruption(ring):
+    before = ring.get_nodes_many(KEYS)
+    ring.add_node("node10")
+    after = ring.get_nodes_many(KEYS)
+    assert 1 / 11 <= ring.disruption < 0.15
+    assert sum(1 for b, a in zip(before, after) if b != a) < 0.15 * len(KEYS)
+
+    ring.remove_node("node10")
+    assert ring.disruption < 0.15
+    assert ring.get_nodes_many(KEYS) == before
+
+    for nodename in list(ring.nodes):
+        ring.remove_node(nodename)
+    assert ring.size == 0 and ring.disruption == 1.0
+    assert ring.get_node("coconut") is None
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+import pytest
+
+from uhashring import HashRing
+
+
+@pytest.fixture(params=[{}, {"hash_fn": "ketama"}, {"lookup_cache": 64}, {"algorithm": "jump"}])
+def kwargs(request):
+    return request.param
+
+
+def test_metrics_disabled():
+    ring = HashRing(["node1", "node2"])
+    assert ring.metrics is None
+    assert ring.get_node("coconut") in ("node1", "node2")
+
+
+def test_metrics_lookups(kwargs):
+    nodes = ["node{}".format(i) for i in range(5)]
+    ring = HashRing(nodes, metrics=True, **kwargs)
+    reference = HashRing(nodes, **kwargs)
+
+    keys = ["key{}".format(i) for i in range(1000)]
+    for key in keys:
+        assert ring.get_node(key) == reference.get_node(key)
+        assert ring.get(key) == reference.get(key)
+    assert ring.get_nodes_many(keys) == reference.get_nodes_many(keys)
+    assert ring.metrics.lookup_total == 3000
+    for nodename in nodes:
+        assert ring.metrics.lookups[nodename] == 3 * sum(
+            reference.get_node(key) == nodename for key in keys
+        )
+
+    # the counters survive a continuum change
+    ring.add_node("node5")
+    ring.get_node("coconut")
+    assert ring.metrics.lookup_total == 3001
+
+    ring.metrics.reset()
+    assert ring.metrics.lookup_total == 0
+    ring.get_node_port("coconut")
+    assert ring.metrics.lookup_total == 1
+    assert ring.get_server("coconut")[1] == ring.get_node("coconut")
+    assert ring.metrics.lookup_total == 3
+
+
+def test_metrics_rebuilds(kwargs):
+    events = []
+    ring = HashRing(["node1", "node2"], on_rebuild=events.append, **kwargs)
+    assert [e.operation for e in events] == ["create_ring"]
+    assert events[0].nodes == 2
+    assert events[0].points == len(ring._keys)
+    assert events[0].duration >= 0
+
+    ring.add_node("node3")
+    ring.remove_node("node1")
+    ring.regenerate()
+    assert [e.operation for e in events] == [
+        "create_ring",
+        "update_ring",
+        "remove_node",
+        "create_ring",
+    ]
+    assert [e.nodes for e in events] == [2, 3, 2, 2]
+    assert ring.metrics.rebuilds == 4
+    assert ring.metrics.last_rebuild is events[-1]
+    assert ring.metrics.rebuild_duration == pytest.approx(sum(e.duration for e in events))
+
+
+def test_metrics_lookup_samples():
+    samples = []
+    ring = HashRing(["node1", "node2"], on_lookup_sample=samples.append, lookup_sample_interval=10)
+    for i in range(100):
+        ring.get_node("key{}".format(i))
+    assert len(samples) == 10
+    assert [s.key for s in samples] == ["key{}".format(i) for i in range(9, 100, 10)]
+    for sample in samples:
+        assert sample.nodename == ring.get_node(sample.key)
+        assert sample.duration >= 0
+
+
+@pytest.mark.parametrize("hash_fn", [None, "ketama"])
+def test_metrics_get_server_samples(hash_fn):
+    samples = []
+    ring = HashRing(
+        ["node1", "node2"],
+        hash_fn=hash_fn,
+        on_lookup_sample=samples.append,
+        lookup_sample_interval=10,
+    )
+    servers = [ring.get_server("key{}".format(i)) for i in range(100)]
+    assert len(samples) == 10
+    assert [s.key for s in samples] == ["key{}".format(i) for i in range(9, 100, 10)]
+    for sample, server in zip(samples, servers[9::10]):
+        assert sample.nodename == server[1]
+    assert ring.metrics.lookup_total == 100
+
+
+def test_metrics_errors():
+    with pytest.raises(TypeError):
+        HashRing(["node1"], on_rebuild="not callable")
+    with pytest.raises(ValueError):
+        HashRing(["node1"], metrics=True, lookup_sample_interval=0)
@@ -2,6 +2,8 @@
 """
 """
 
+import pytest
+
 from uhashring import HashRing, monkey
 
 
@@ -23,3 +25,128 @@ def test_patch_memcache():
     mc.get((0, "zzzzzzzzzz"))
 
     assert isinstance(mc.uhashring, HashRing)
+
+
+class FakeHost:
+    def __init__(self, server):
+        self.ip, self.port = server.split(":")
+        self.port = int(self.port)
+        self.weight = 1
+        self.alive = True
+
+    def connect(self):
+        return self.alive
+
+
+class FakeClient:
+    """Stands in for the memcache.Client methods used by the patch."""
+
+    _SERVER_RETRIES = 2
+
+    def __init__(self, servers):
+        self.servers = [FakeHost(server) for server in servers]
+        self.do_check_key = True
+        self.requests = []
+        self.store = {}
+
+    def _encode_key(self, key):
+        if isinstance(key, str):
+            return key.encode("utf8")
+        return key
+
+    def key_encoder(self, key):
+        return key
+
+    def check_key(self, key, key_extra_len=0):
+        if key is None:
+            raise ValueError("key is None")
+
+    def _get_server(self, key):
+        serverhash, key = key
+        return self.servers[serverhash % len(self.servers)], key
+
+    def _map_and_prefix_keys(self, key_iterable, key_prefix):
+        server_keys = {}
+        prefixed_to_orig_key = {}
+        for orig_key in key_iterable:
+            server, key = self._get_server((orig_key[0], key_prefix + orig_key[1]))
+            server_keys.setdefault(server, []).append(key)
+            prefixed_to_orig_key[key] = orig_key
+        return server_keys, prefixed_to_orig_key
+
+    def set_multi(self, mapping, key_prefix=""):
+        server_keys, prefixed_to_orig_key = self._map_and_prefix_keys(mapping, key_prefix)
+        for server, keys in server_keys.items():
+            self.requests.append((server.ip, keys))
+            for key in keys:
+                self.store[(server.ip, key)] = mapping[prefixed_to_orig_key[key]]
+
+    def get_multi(self, keys, key_prefix=""):
+        server_keys, prefixed_to_orig_key = self._map_and_prefix_keys(keys, key_prefix)
+        values = {}
+        for server, server_keys in server_keys.items():
+            self.requests.append((server.ip, server_keys))
+            for key in server_keys:
+                if (server.ip, key) in self.store:
+                    values[prefixed_to_orig_key[key]] = self.store[(server.ip, key)]
+        return values
+
+
+def test_patch_memcache_multi():
+    class Client(FakeClient):
+        pass
+
+    monkey.patch_memcache(Client)
+    # patching twice is a no-op
+    monkey.patch_memcache(Client)
+
+    mc = Client(["10.0.0.{}:11211".format(i) for i in range(1, 6)])
+    ring = mc.uhashring
+    keys = ["key{}".format(i) for i in range(200)]
+    mapping = {key: i for i, key in enumerate(keys)}
+    mapping[42] = "int key"
+
+    # every server gets a single request
+    mc.set_multi(mapping, key_prefix="pfx_")
+    assert len(mc.requests) == len(ring.nodes)
+    for nodename, server_keys in mc.requests:
+        for key in server_keys:
+            assert ring.get_node(key) == nodename
+    partition = ring.partition(b"pfx_" + str(key).encode("utf8") for key in mapping)
+    assert {nodename: keys for nodename, keys in mc.requests} == partition
+
+    del mc.requests[:]
+    assert mc.get_multi(list(mapping), key_prefix="pfx_") == mapping
+    assert len(mc.requests) == len(ring.nodes)
+
+    # the keys of a dead server are mapped to the next available server
+    dead = ring.nodes["10.0.0.1"]["instance"]
+    dead.alive = False
+    del mc.requests[:]
+    mc.set_multi(mapping)
+    assert "10.0.0.1" not in [nodename for nodename, _ in mc.requests]
+    assert sum(len(server_keys) for _, server_keys in mc.requests) == len(mapping)
+    for nodename, server_keys in mc.requests:
+        for key in server_keys:
+            live = [n["nodename"] for n in ring.range(key) if n["nodename"] != "10.0.0.1"]
+            assert live[0] == nodename
+
+    # the keys with an explicit server hash are mapped by the client
+    server_keys, prefixed_to_orig_key = mc._map_and_prefix_keys([(1, b"tuple")], b"")
+    assert server_keys == {mc.servers[1]: [b"tuple"]}
+
+    with pytest.raises(ValueError):
+        mc.get_multi([None])
+
+
+def test_partition():
+    ring = HashRing(["node1", "node2", "node3"])
+    keys = ["key{}".format(i) for i in range(100)]
+    partition = ring.partition(iter(keys))
+    assert sorted(k for node_keys in partition.values() for k in node_keys) == sorted(keys)
+    for nodename, node_keys in partition.items():
+        assert [ring.get_node(key) for key in node_keys] == [nodename] * len(node_keys)
+        # the keys keep their order
+        assert node_keys == sorted(node_keys, key=keys.index)
+
+    assert HashRing().partition(keys) == {}
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+""" """
+
+from bisect import bisect
+from hashlib import md5
+
+import pytest
+
+from uhashring import HashRing
+
+KEYS = ["key{}".format(i) for i in range(5000)]
+
+
+def _find_arc(arcs, h):
+    i = bisect([arc.start for arc in arcs], h) - 1
+    if i >= 0 and arcs[i].start <= h < arcs[i].end:
+        return arcs[i]
+    return None
+
+
+@pytest.mark.parametrize("hash_fn", [None, "md5_64", "ketama"])
+@pytest.mark.parametrize(
+    "nodes",
+    [
+        {"node1": 1, "node2": 1, "node3": 1, "node4": 1},
+        {"node1": 1, "node2": 1},
+        {"node1": 1, "node2": 3, "node3": 1},
+    ],
+)
+def test_plan_moves(hash_fn, nodes):
+    ring = HashRing({"node1": 1, "node2": 1, "node3": 1}, hash_fn=hash_fn, compact=True)
+    plan = ring.plan_moves(nodes)
+    other = HashRing(nodes, hash_fn=hash_fn)
+    assert plan == ring.plan_moves(other)
+
+    # the arcs are sorted, disjoint and match the moved keys
+    assert plan.keyspace == 1 << (32 if hash_fn == "ketama" else 128 if hash_fn is None else 64)
+    for arc, next_arc in zip(plan.arcs, plan.arcs[1:]):
+        assert arc.start < arc.end <= next_arc.start
+    moved = {
+        key: (old_node, new_node) for key, old_node, new_node in ring.iter_moved_keys(other, KEYS)
+    }
+    for key in KEYS:
+        arc = _find_arc(plan.arcs, ring.hashi(key))
+        if key in moved:
+            assert (arc.old_node, arc.new_node) == moved[key]
+        else:
+            assert arc is None
+
+    # the moved fractions match the moved keys
+    assert sum(plan.moved.values()) == pytest.approx(len(moved) / len(KEYS), abs=0.03)
+    for (old_node, new_node), fraction in plan.moved.items():
+        assert old_node != new_node
+        size = sum(arc.end - arc.start for arc in plan.arcs if arc[2:] == (old_node, new_node))
+        assert size / plan.keyspace == pytest.approx(fraction)
+
+
+def _signed_hash(key):
+    # a signed 32 bits hash like mmh3.hash
+    return int.from_bytes(md5(str(key).encode("utf-8")).digest()[:4], "little", signed=True)
+
+
+def test_plan_moves_signed_hash():
+    ring = HashRing({"node1": 1, "node2": 1, "node3": 1}, hash_fn=_signed_hash)
+    other = HashRing({"node1": 1, "node2": 1, "node3": 1, "node4": 1}, hash_fn=_signed_hash)
+    plan = ring.plan_moves(other)
+    assert plan.keyspace == 1 << 32
+    assert -(1 << 31) <= plan.arcs[0].start
+    assert plan.arcs[-1].end <= 1 << 31
+
+    moved = list(ring.iter_moved_keys(other, KEYS))
+    assert sum(plan.moved.values()) == pytest.approx(len(moved) / len(KEYS), abs=0.03)
+    for key, old_node, new_node in moved:
+        arc = _find_arc(plan.arcs, ring.hashi(key))
+        assert (arc.old_node, arc.new_node) == (old_node, new_node)
+
+    # the whole signed keyspace moves from an empty ring
+    plan = HashRing(hash_fn=_signed_hash).plan_moves(ring)
+    assert (plan.arcs[0].start, plan.arcs[-1].end) == (-(1 << 31), 1 << 31)
+    assert sum(plan.moved.values()) == pytest.approx(1)
+
+
+def test_plan_moves_empty_and_identical():
+    ring = HashRing({"node1": 1, "node2": 1})
+    assert ring.plan_moves(ring) == ([], {}, 1 << 128)
+    assert HashRing().plan_moves([]) == ([], {}, 1 << 128)
+
+    plan = HashRing().plan_moves(["node1"])
+    assert plan.arcs == [(0, 1 << 128, None, "node1")]
+    assert plan.moved == {(None, "node1"): 1.0}
+
+
+def test_plan_moves_errors():
+    ring = HashRing(["node1", "node2"])
+    with pytest.raises(ValueError):
+        ring.plan_moves(HashRing(["node1", "node2"], hash_fn="md5_64"))
+    with pytest.raises(ValueError):
+        HashRing(["node1"], algorithm="jump").plan_moves(["node1", "node2"])
+
+
+@pytest.mark.parametrize("algorithm", [None, "jump"])
+def test_iter_moved_keys(algorithm):
+    ring = HashRing(["node1", "node2", "node3"], algorithm=algorithm)
+    other = HashRing(["node1", "node2", "node3", "node4"], algorithm=algorithm)
+    moved = list(ring.iter_moved_keys(other, iter(KEYS), chunk_size=7))
+    assert moved == [
+        (key, ring.get_node(key), other.get_node(key))
+        for key in KEYS
+        if ring.get_node(key) != other.get_node(key)
+    ]
+    assert {new_node for key, old_node, new_node in moved} == {"node4"}
+    assert len(moved) == ring.count_moved_keys(other, KEYS)
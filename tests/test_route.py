@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+import io
+from itertools import count, islice
+
+import pytest
+
+from uhashring import HashRing
+from uhashring.__main__ import main, parse_nodes
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+@pytest.mark.parametrize("kwargs", [{}, {"hash_fn": "ketama"}, {"hash_fn": "md5_64", "lazy": True}])
+def test_route_stream(kwargs, workers):
+    ring = HashRing(["node{}".format(i) for i in range(10)], **kwargs)
+    ring.mark_down("node3")
+    keys = ["key{}".format(i) for i in range(5000)]
+    routed = list(ring.route_stream(iter(keys), chunk_size=300, workers=workers))
+    assert routed == [(key, ring.get_node(key)) for key in keys]
+    assert "node3" not in {nodename for _, nodename in routed}
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_route_stream_lazy(workers):
+    ring = HashRing(["node1", "node2", "node3"])
+    # the keys are consumed by chunks, an endless stream can be routed
+    keys = ("key{}".format(i) for i in count())
+    routed = list(islice(ring.route_stream(keys, chunk_size=100, workers=workers), 2500))
+    assert [key for key, _ in routed] == ["key{}".format(i) for i in range(2500)]
+
+
+def test_route_stream_errors():
+    with pytest.raises(ValueError):
+        list(HashRing(["node1"]).route_stream(["key"], chunk_size=0))
+    with pytest.raises(ValueError):
+        list(HashRing(["node1"], algorithm="jump").route_stream(["key"], workers=2))
+    assert list(HashRing().route_stream(["key"])) == [("key", None)]
+
+
+def test_parse_nodes():
+    assert parse_nodes(["node1", "node2=3", "10.0.0.1:11211=2", "10.0.0.2:11211", "a=b"]) == {
+        "node1": 1,
+        "node2": 3,
+        "10.0.0.1:11211": 2,
+        "10.0.0.2:11211": 1,
+        "a=b": 1,
+    }
+
+
+def test_route_cli(monkeypatch, capsys, tmp_path):
+    keys = ["key{}".format(i) for i in range(100)]
+    ring = HashRing({"node1": 1, "node2": 2}, hash_fn="ketama")
+    expected = "".join("{}\t{}\n".format(key, ring.get_node(key)) for key in keys)
+
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(keys) + "\n"))
+    main(["route", "--nodes", "node1", "node2=2", "--hash-fn", "ketama", "--chunk-size", "7"])
+    assert capsys.readouterr().out == expected
+
+    path = str(tmp_path / "ring.snapshot")
+    ring.save_snapshot(path)
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(keys) + "\n"))
+    main(["route", "--snapshot", path, "--workers", "2", "--separator", ","])
+    assert capsys.readouterr().out == expected.replace("\t", ",")
+
+    with pytest.raises(SystemExit):
+        main(["route"])
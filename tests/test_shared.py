@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+import multiprocessing
+import os
+
+import pytest
+
+from uhashring import HashRing
+
+KEYS = ["key{}".format(i) for i in range(1000)]
+
+
+@pytest.fixture
+def shm_name():
+    return "uhashring_test_{}".format(os.getpid())
+
+
+def _worker_lookups(name, keys, queue):
+    reader = HashRing.from_shared_memory(name)
+    queue.put(reader.get_nodes_many(keys))
+    reader.runtime.close()
+
+
+@pytest.mark.parametrize("hash_fn", [None, "md5_64", "ketama"])
+def test_shared_memory(hash_fn, shm_name):
+    ring = HashRing(["node1", "node2"], hash_fn=hash_fn, shared_memory=shm_name)
+    try:
+        reader = HashRing.from_shared_memory(shm_name)
+        assert reader.runtime._generation == 1
+        assert reader.nodes.keys() == ring.nodes.keys()
+        assert reader.distribution == ring.distribution
+        assert reader.get_nodes_many(KEYS) == ring.get_nodes_many(KEYS)
+        assert [reader.get_node(k) for k in KEYS] == [ring.get_node(k) for k in KEYS]
+
+        # readers follow the changes published by the coordinator
+        ring.add_node("node3", {"weight": 2})
+        assert [reader.get_node(k) for k in KEYS] == [ring.get_node(k) for k in KEYS]
+        assert reader.runtime._generation == 2
+        ring.remove_node("node1")
+        assert reader.get_nodes_many(KEYS) == ring.get_nodes_many(KEYS)
+        assert reader.runtime._generation == 3
+        assert set(reader.nodes) == {"node2", "node3"}
+        reader.runtime.close()
+
+        # cached lookups follow the changes too
+        cached = HashRing.from_shared_memory(shm_name, lookup_cache=100)
+        assert [cached.get_node(k) for k in KEYS] == [ring.get_node(k) for k in KEYS]
+        ring.add_node("node1")
+        assert [cached.get_node(k) for k in KEYS] == [ring.get_node(k) for k in KEYS]
+        cached.runtime.close()
+
+        # readers can not change the ring
+        with pytest.raises(TypeError):
+            reader.remove_node("node2")
+        reader = HashRing.from_shared_memory(shm_name)
+        for change in (
+            lambda: reader.add_node("node4"),
+            lambda: reader.update(remove=["node2"]),
+            lambda: reader.update(reweight={"node2": 3}),
+        ):
+            with pytest.raises(TypeError):
+                change()
+        with pytest.raises(TypeError):
+            reader.nodes["node4"] = {}
+        assert reader.nodes.keys() == ring.nodes.keys()
+        assert [reader.get_node(k) for k in KEYS] == [ring.get_node(k) for k in KEYS]
+        reader.runtime.close()
+    finally:
+        ring.runtime.unlink()
+
+
+def test_shared_memory_empty(shm_name):
+    ring = HashRing(shared_memory=shm_name)
+    try:
+        reader = HashRing.from_shared_memory(shm_name)
+        assert reader.get_node("key") is None
+        ring.add_node("node1")
+        assert reader.get_node("key") == "node1"
+        reader.runtime.close()
+    finally:
+        ring.runtime.unlink()
+
+
+def test_shared_memory_workers(shm_name):
+    ring = HashRing({"node1": 1, "node2": 2, "node3": 1}, shared_memory=shm_name)
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        for _ in range(2):
+            queue = ctx.Queue()
+            worker = ctx.Process(target=_worker_lookups, args=(shm_name, KEYS, queue))
+            worker.start()
+            assert queue.get(timeout=30) == ring.get_nodes_many(KEYS)
+            worker.join()
+            assert worker.exitcode == 0
+            ring.add_node("node4")
+    finally:
+        ring.runtime.unlink()
+
+    with pytest.raises(FileNotFoundError):
+        HashRing.from_shared_memory(shm_name)
+
+
+def test_shared_memory_errors(shm_name):
+    with pytest.raises(ValueError):
+        HashRing(["node1"], algorithm="jump", shared_memory=shm_name)
+    with pytest.raises(ValueError):
+        HashRing(["node1"], lazy=True, shared_memory=shm_name)
+    with pytest.raises(FileNotFoundError):
+        HashRing.from_shared_memory(shm_name)
+
+
+@pytest.mark.parametrize(
+    "nodes, kwargs",
+    [
+        (["node1"], {"load_factor": 0.5}),
+        (["node1"], {"weight_fn": 42}),
+        (["node1"], {"hash_fn": lambda key: hash(key)}),
+        ({"node1": {"weight": "coconut"}}, {}),
+    ],
+)
+def test_shared_memory_failed_init(shm_name, nodes, kwargs):
+    # a failed coordinator must not leave any segment behind
+    with pytest.raises((TypeError, ValueError)):
+        HashRing(nodes, shared_memory=shm_name, **kwargs)
+    with pytest.raises(FileNotFoundError):
+        HashRing.from_shared_memory(shm_name)
+
+    ring = HashRing(["node1"], shared_memory=shm_name)
+    try:
+        assert ring.get_node("coconut") == "node1"
+    finally:
+        ring.runtime.unlink()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+from hashlib import md5
+
+import pytest
+
+from uhashring import HashRing, hashes, register_hash_fn
+
+KEYS = ["key{}".format(i) for i in range(2000)]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "ring.snapshot")
+
+
+def _assert_same_ring(ring, loaded):
+    assert loaded.nodes == ring.nodes
+    assert loaded.distribution == ring.distribution
+    assert loaded.size == ring.size
+    assert list(loaded._keys) == list(ring._keys)
+    assert loaded.ring == ring.ring
+    assert loaded.get_nodes_many(KEYS) == ring.get_nodes_many(KEYS)
+    assert [loaded.get_server(k) for k in KEYS] == [ring.get_server(k) for k in KEYS]
+
+
+@pytest.mark.parametrize("hash_fn", [None, "md5_64", "ketama"])
+def test_snapshot(hash_fn, snapshot_path):
+    nodes = {"node1": 1, "node2": {"weight": 2, "port": 11211}, 3: 1}
+    ring = HashRing(nodes, hash_fn=hash_fn)
+    ring.save_snapshot(snapshot_path)
+    loaded = HashRing.from_snapshot(snapshot_path)
+    _assert_same_ring(ring, loaded)
+    if hash_fn != "md5_64":
+        return
+
+    # 64 bits points are memory mapped
+    assert isinstance(loaded._keys, memoryview)
+
+    # the loaded ring can still change
+    for r in (ring, loaded):
+        r.add_node("node4", {"weight": 3})
+        r.remove_node("node1")
+    _assert_same_ring(ring, loaded)
+
+
+def _signed_hash(key):
+    # a signed 32 bits hash like mmh3.hash
+    return int.from_bytes(md5(str(key).encode("utf-8")).digest()[:4], "little", signed=True)
+
+
+def test_snapshot_signed_hash(snapshot_path, monkeypatch):
+    # the registrations of this test must not leak into the other tests
+    monkeypatch.setattr(hashes, "_hash_functions", dict(hashes._hash_functions))
+    register_hash_fn("md5_signed", _signed_hash)
+
+    ring = HashRing({"node1": 1, "node2": 2, "node3": 1}, hash_fn="md5_signed")
+    assert ring._keys[0] < 0
+    ring.save_snapshot(snapshot_path)
+    loaded = HashRing.from_snapshot(snapshot_path)
+    _assert_same_ring(ring, loaded)
+
+
+def test_snapshot_ketama_update(snapshot_path):
+    ring = HashRing({"node{}".format(i): 1 for i in range(5)}, hash_fn="ketama", replicas=3)
+    ring.save_snapshot(snapshot_path)
+    loaded = HashRing.from_snapshot(snapshot_path)
+    assert loaded.runtime._replicas == 3
+    assert isinstance(loaded._keys, memoryview)
+    for r in (ring, loaded):
+        r.add_node("node5", {"weight": 2})
+        r.remove_node("node0")
+    _assert_same_ring(ring, loaded)
+
+
+def test_snapshot_errors(snapshot_path):
+    HashRing().save_snapshot(snapshot_path)
+    assert HashRing.from_snapshot(snapshot_path).get_node("coconut") is None
+
+    with pytest.raises(ValueError):
+        HashRing(["node1"], hash_fn=lambda key: hash(key)).save_snapshot(snapshot_path)
+
+    with pytest.raises(ValueError):
+        HashRing(["node1"], algorithm="jump").save_snapshot(snapshot_path)
+
+    with open(snapshot_path, "wb") as f:
+        f.write(b"coconut" * 10)
+    with pytest.raises(ValueError):
+        HashRing.from_snapshot(snapshot_path)
+
+
+@pytest.mark.parametrize("hash_fn", ["md5_64", "ketama", None])
+def test_snapshot_truncated(snapshot_path, hash_fn):
+    HashRing(["node1", "node2", "node3"], hash_fn=hash_fn).save_snapshot(snapshot_path)
+    with open(snapshot_path, "rb") as f:
+        snapshot = f.read()
+    for size in (len(snapshot) - 2000, len(snapshot) - 1):
+        with open(snapshot_path, "wb") as f:
+            f.write(snapshot[:size])
+        with pytest.raises(ValueError, match="invalid snapshot"):
+            HashRing.from_snapshot(snapshot_path)
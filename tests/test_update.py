@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+"""
+import pytest
+
+from uhashring import HashRing
+
+
+@pytest.fixture(
+    params=[
+        {},
+        {"hash_fn": "ketama"},
+        {"hash_fn": "md5_64", "compact": True},
+        {"algorithm": "jump"},
+        {"algorithm": "maglev", "table_size": 307},
+    ]
+)
+def kwargs(request):
+    return request.param
+
+
+def test_update(kwargs):
+    events = []
+    ring = HashRing({"node{}".format(i): 1 for i in range(60)}, on_rebuild=events.append, **kwargs)
+    ring.set_load("node0", 3)
+    ring.mark_down("node1")
+    del events[:]
+
+    # replacing 50 nodes costs one rebuild
+    result = ring.update(
+        add={"new{}".format(i): 1 for i in range(50)},
+        remove=["node{}".format(i) for i in range(50)],
+        reweight={"node55": 3},
+    )
+    assert len(events) == 1
+    assert result.added == ["new{}".format(i) for i in range(50)]
+    assert result.removed == ["node{}".format(i) for i in range(50)]
+    assert result.updated == ["node55"]
+    assert ring.loads["node0"] == 0
+    assert ring.down_nodes == frozenset()
+
+    assert set(ring.nodes) == set(result.added) | {"node{}".format(i) for i in range(50, 60)}
+    assert ring.nodes["node55"]["weight"] == 3
+    expected = HashRing({n: c["weight"] for n, c in ring.nodes.items()}, **kwargs)
+    assert ring.distribution == expected.distribution
+    if "algorithm" not in kwargs:
+        keys = ["key{}".format(i) for i in range(1000)]
+        assert ring.get_nodes_many(keys) == expected.get_nodes_many(keys)
+        assert ring.runtime._keys == expected.runtime._keys
+
+
+def test_update_unchanged(kwargs):
+    events = []
+    ring = HashRing(["node1", "node2"], on_rebuild=events.append, **kwargs)
+    result = ring.update(add={"node1": {"instance": "instance1"}}, reweight={"node2": 1})
+    assert result == ([], [], [])
+    assert len(events) == 1
+    assert ring.get_node_instance("coconut") in ("instance1", None)
+    assert ring.get("coconut") == ring.nodes[ring.get_node("coconut")]
+
+
+def test_update_errors(kwargs):
+    events = []
+    ring = HashRing(["node1", "node2"], on_rebuild=events.append, **kwargs)
+    nodes = {nodename: dict(conf) for nodename, conf in ring.nodes.items()}
+
+    with pytest.raises(KeyError):
+        ring.update(add=["node3"], remove=["node4"])
+    with pytest.raises(KeyError):
+        ring.update(reweight={"node4": 2})
+    with pytest.raises(ValueError):
+        ring.update(add=["node1"], remove=["node1"])
+    with pytest.raises(ValueError):
+        ring.update(add={"node3": 1, "node4": "invalid"}, remove=["node1"])
+    with pytest.raises(ValueError):
+        ring.update(add=1)
+    assert ring.nodes == nodes
+    assert len(events) == 1
+
+
+def test_batch(kwargs):
+    ring = HashRing(["node1", "node2", "node3"], **kwargs)
+    with ring.batch() as batch:
+        batch.add_node("node4", {"weight": 2})
+        batch.remove_node("node1")
+        batch.reweight("node2", 3)
+        batch.add_node("node5")
+        batch.remove_node("node5")
+    assert batch.result == (["node4"], ["node1"], ["node2"])
+    assert set(ring.nodes) == {"node2", "node3", "node4"}
+    assert ring.nodes["node2"]["weight"] == 3
+
+    with pytest.raises(RuntimeError):
+        with ring.batch() as batch:
+            batch.remove_node("node2")
+            raise RuntimeError()
+    assert batch.result is None
+    assert set(ring.nodes) == {"node2", "node3", "node4"}
@@ -1,4 +1,5 @@
+from uhashring.hashes import register_hash_fn
 from uhashring.ring import HashRing
 
-__all__ = ["HashRing", "monkey"]
+__all__ = ["HashRing", "monkey", "register_hash_fn"]
 __version__ = "2.4"
@@ -0,0 +1,78 @@
+"""Command line interface of uhashring.
+
+Route the keys read from stdin, one per line, and write their
+"key<TAB>nodename" lines to stdout in the same order:
+
+    cat keys.txt | python -m uhashring route --nodes node1 node2 node3=2
+    cat keys.txt | python -m uhashring route --snapshot ring.snapshot --workers 4
+"""
+
+import argparse
+import sys
+
+from uhashring import HashRing
+
+
+def parse_nodes(nodes):
+    """Returns the nodes configuration of the given "nodename[=weight]"
+    strings, "=" does not clash with the usual "host:port" node names.
+
+    :param nodes: a list of "nodename[=weight]" strings.
+    """
+    conf = {}
+    for node in nodes:
+        nodename, _, weight = node.rpartition("=")
+        if nodename and weight.isdigit():
+            conf[nodename] = int(weight)
+        else:
+            conf[node] = 1
+    return conf
+
+
+def route(args):
+    """Route the keys read from stdin.
+
+    :param args: the parsed command line arguments.
+    """
+    if args.snapshot:
+        ring = HashRing.from_snapshot(args.snapshot)
+    else:
+        kwargs = {"hash_fn": args.hash_fn}
+        if args.vnodes is not None:
+            kwargs["vnodes"] = args.vnodes
+        ring = HashRing(parse_nodes(args.nodes), **kwargs)
+
+    keys = (line.rstrip("\r\n") for line in args.input)
+    write = args.output.write
+    for key, nodename in ring.route_stream(keys, args.chunk_size, args.workers):
+        write("{}{}{}\n".format(key, args.separator, nodename))
+    args.output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m uhashring",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_route = commands.add_parser("route", help="route the keys read from stdin")
+    ring = parser_route.add_mutually_exclusive_group(required=True)
+    ring.add_argument(
+        "--nodes", nargs="+", metavar="NODE", help="the ring nodes as nodename[=weight]"
+    )
+    ring.add_argument("--snapshot", help="load the ring from this snapshot file")
+    parser_route.add_argument("--hash-fn", help="the hash function name (like ketama or md5_64)")
+    parser_route.add_argument("--vnodes", type=int, help="the default number of vnodes per node")
+    parser_route.add_argument("--workers", type=int, help="the number of worker processes")
+    parser_route.add_argument("--chunk-size", type=int, default=10000)
+    parser_route.add_argument("--separator", default="\t")
+    parser_route.set_defaults(func=route, input=sys.stdin, output=sys.stdout)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
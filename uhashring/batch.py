@@ -0,0 +1,67 @@
+from collections import namedtuple
+
+RingUpdate = namedtuple("RingUpdate", ["added", "removed", "updated"])
+RingUpdate.__doc__ = """The nodes changes applied by a bulk update.
+
+- added: the names of the new nodes.
+- removed: the names of the removed nodes.
+- updated: the names of the existing nodes whose configuration changed.
+"""
+
+
+class Batch:
+    """Collect nodes changes and apply them with a single HashRing.update
+    when the context exits without error.
+
+    The RingUpdate of the applied changes is then available as result.
+    """
+
+    def __init__(self, hashring):
+        """Create a new batch of changes of the given ring.
+
+        :param hashring: the HashRing to update.
+        """
+        self._hashring = hashring
+        self._add = {}
+        self._remove = {}
+        self._reweight = {}
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.result = self._hashring.update(
+                add=self._add, remove=list(self._remove), reweight=self._reweight
+            )
+
+    def add_node(self, nodename, conf={"weight": 1}):
+        """Add (or overwrite) the given node with its configuration.
+
+        :param nodename: the node name.
+        :param conf: the node configuration.
+        """
+        self._remove.pop(nodename, None)
+        self._add[nodename] = conf
+
+    def remove_node(self, nodename):
+        """Remove the given node.
+
+        :param nodename: the node name.
+        """
+        self._reweight.pop(nodename, None)
+        if nodename in self._add:
+            del self._add[nodename]
+            # a node added in the batch is only dropped from the batch
+            if nodename not in self._hashring.runtime._nodes:
+                return
+        self._remove[nodename] = None
+
+    def reweight(self, nodename, weight):
+        """Change the weight of the given node.
+
+        :param nodename: the node name.
+        :param weight: the new weight of the node.
+        """
+        self._reweight[nodename] = weight
@@ -0,0 +1,90 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+def owners_typecode(numnames):
+    """Returns the smallest array typecode of the indexes into a node names
+    table of the given size.
+
+    :param numnames: the number of node names.
+    """
+    if numnames <= 1 << 8:
+        return "B"
+    elif numnames <= 1 << 16:
+        return "H"
+    return "L"
+
+
+def compact_continuum(keys, ring):
+    """Returns a compact (keys, ring) representation of the given continuum.
+
+    The sorted points are stored in a typed array and their owners in a
+    parallel array of indexes into a table of node names.
+
+    Points which can't fit in an unsigned 64 bits integer (like the default
+    128 bits md5 MetaRing points) are kept as a list.
+
+    :param keys: the sorted list of points of the continuum.
+    :param ring: the point to node name mapping of the continuum.
+    """
+    names = []
+    index = {}
+    for nodename in ring.values():
+        if nodename not in index:
+            index[nodename] = len(names)
+            names.append(nodename)
+
+    owners = array(owners_typecode(len(names)), [index[ring[k]] for k in keys])
+
+    for typecode in ("I", "L", "Q"):
+        try:
+            keys = array(typecode, keys)
+        except (OverflowError, TypeError):
+            continue
+        else:
+            break
+    return keys, CompactRing(keys, owners, names, len(ring))
+
+
+class CompactRing(Mapping):
+    """Read only point to node name mapping view of a compact continuum."""
+
+    __slots__ = ("_keys", "_names", "_owners", "_size")
+
+    def __init__(self, keys, owners, names, size):
+        """Create a new CompactRing view.
+
+        :param keys: the sorted points of the continuum.
+        :param owners: the index of the owner node name of every point.
+        :param names: the node names table.
+        :param size: the number of distinct points.
+        """
+        self._keys = keys
+        self._names = names
+        self._owners = owners
+        self._size = size
+
+    def __getitem__(self, point):
+        pos = bisect_left(self._keys, point)
+        if pos == len(self._keys) or self._keys[pos] != point:
+            raise KeyError(point)
+        return self._names[self._owners[pos]]
+
+    def __iter__(self):
+        last = object()
+        for point in self._keys:
+            if point != last:
+                yield point
+                last = point
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.copy()})"
+
+    def copy(self):
+        """Returns a point to node name dict of the continuum."""
+        _names = self._names
+        return dict(zip(self._keys, (_names[i] for i in self._owners)))
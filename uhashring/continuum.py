@@ -0,0 +1,51 @@
+from collections import Counter, namedtuple
+
+
+class Continuum(namedtuple("Continuum", ["keys", "ring", "nodes", "distribution"])):
+    """An immutable version of the continuum/ring of a runtime.
+
+    - keys: the sorted points (or positions) of the continuum.
+    - ring: the point (or position) to node name mapping.
+    - nodes: the node name to node configuration mapping.
+    - distribution: the counter of the points of every node.
+
+    A published continuum is never changed, runtimes build a new one on
+    every node change and publish it with a single reference swap so that
+    lookups reading it once are lock free and always consistent.
+    """
+
+    __slots__ = ()
+
+
+class ContinuumRuntime:
+    """Publish the continuum of a runtime as an immutable Continuum."""
+
+    _continuum = Continuum([], {}, {}, Counter())
+
+    def _publish(self, keys, ring, distribution):
+        """Publish a new continuum built from the given keys, ring and
+        distribution along with a copy of the current nodes configuration.
+
+        :param keys: the sorted points of the continuum.
+        :param ring: the point to node name mapping of the continuum.
+        :param distribution: the counter of the points of every node.
+        """
+        self._continuum = Continuum(keys, ring, dict(self._nodes), distribution)
+
+    def _update_nodes(self):
+        """Publish the current continuum again with a copy of the current
+        nodes configuration."""
+        continuum = self._continuum
+        self._publish(continuum.keys, continuum.ring, continuum.distribution)
+
+    @property
+    def _distribution(self):
+        return self._continuum.distribution
+
+    @property
+    def _keys(self):
+        return self._continuum.keys
+
+    @property
+    def _ring(self):
+        return self._continuum.ring
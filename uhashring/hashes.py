@@ -0,0 +1,157 @@
+from hashlib import blake2b, md5
+
+try:
+    import mmh3
+except ImportError:
+    mmh3 = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+__all__ = ["get_hash_fn", "register_hash_fn"]
+
+_hash_functions = {}
+
+
+def _to_bytes(key):
+    """Returns the bytes to hash for the given key.
+
+    :param key: the key to hash.
+    """
+    if isinstance(key, bytes):
+        return key
+    return str(key).encode("utf-8")
+
+
+def md5_128(key):
+    """Returns an integer derived from the md5 hash of the given key.
+
+    This is the default MetaRing hash function.
+    """
+    return int(md5(str(key).encode("utf-8")).hexdigest(), 16)
+
+
+def md5_64(key):
+    """Returns a 64 bits integer derived from the md5 hash of the given key.
+
+    This is the most significant half of the default 128 bits md5 integer
+    so the continuum order is kept and almost no key moves when switching.
+    """
+    return int.from_bytes(md5(str(key).encode("utf-8")).digest()[:8], "big")
+
+
+def blake2b_64(key):
+    """Returns a 64 bits integer from the blake2b hash of the given key."""
+    return int.from_bytes(blake2b(_to_bytes(key), digest_size=8).digest(), "big")
+
+
+def mmh3_32(key):
+    """Returns an unsigned 32 bits MurmurHash3 of the given key."""
+    return mmh3.hash(_to_bytes(key), signed=False)
+
+
+def mmh3_128(key):
+    """Returns an unsigned 128 bits MurmurHash3 of the given key."""
+    return mmh3.hash128(_to_bytes(key), signed=False)
+
+
+def xxh64(key):
+    """Returns a 64 bits XXH64 hash of the given key."""
+    return xxhash.xxh64_intdigest(_to_bytes(key))
+
+
+def xxh3_64(key):
+    """Returns a 64 bits XXH3 hash of the given key."""
+    return xxhash.xxh3_64_intdigest(_to_bytes(key))
+
+
+def get_hash_fn(name):
+    """Returns the hash function registered under the given name.
+
+    :param name: the name of the hash function.
+    """
+    try:
+        return _hash_functions[name]
+    except KeyError:
+        if name in _missing_packages:
+            raise ImportError(
+                "the '{}' hash function requires the '{}' package".format(
+                    name, _missing_packages[name]
+                )
+            )
+        raise ValueError(
+            "unknown hash function '{}', available: {}".format(name, sorted(_hash_functions))
+        )
+
+
+def get_hash_bits(name):
+    """Returns the number of bits of the hashes returned by the hash
+    function registered under the given name or None when it is unknown.
+
+    :param name: the name of the hash function.
+    """
+    return _hash_bits.get(name)
+
+
+def get_hash_fn_name(hash_fn):
+    """Returns the name the given hash function is registered under or
+    None when it is not registered.
+
+    :param hash_fn: the hash function.
+    """
+    for name, registered_hash_fn in _hash_functions.items():
+        if registered_hash_fn is hash_fn:
+            return name
+    return None
+
+
+def register_hash_fn(name, hash_fn, bits=None):
+    """Register the given hash function so it can be selected by name
+    with the hash_fn parameter of HashRing.
+
+    :param name: the name of the hash function.
+    :param hash_fn: a callable returning an integer hash of the given key.
+    :param bits: the number of bits of the returned hashes, required to
+                 override a hash function of known width like 'md5_64'.
+    """
+    if not hasattr(hash_fn, "__call__"):
+        raise TypeError("hash_fn should be a callable function")
+    if name == "ketama":
+        raise ValueError("the 'ketama' hash function name is reserved")
+    if bits is None and name in _hash_bits:
+        raise ValueError("overriding the '{}' hash function requires its bits".format(name))
+    _hash_functions[name] = hash_fn
+    if bits is not None:
+        _hash_bits[name] = bits
+
+
+_hash_bits = {
+    "blake2b_64": 64,
+    "ketama": 32,
+    "md5": 128,
+    "md5_128": 128,
+    "md5_64": 64,
+    "mmh3_128": 128,
+    "mmh3_32": 32,
+    "xxh3_64": 64,
+    "xxh64": 64,
+}
+
+_hash_functions["md5"] = md5_128
+for _hash_fn in (md5_128, md5_64, blake2b_64):
+    _hash_functions[_hash_fn.__name__] = _hash_fn
+
+# third party hash functions are only registered when their package is
+# installed, selecting them otherwise raises a meaningful ImportError
+_missing_packages = {}
+for _package_name, _package, _hash_fns in (
+    ("mmh3", mmh3, (mmh3_32, mmh3_128)),
+    ("xxhash", xxhash, (xxh64, xxh3_64)),
+):
+    for _hash_fn in _hash_fns:
+        if _package is None:
+            _missing_packages[_hash_fn.__name__] = _package_name
+        else:
+            _hash_functions[_hash_fn.__name__] = _hash_fn
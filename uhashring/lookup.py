@@ -0,0 +1,281 @@
+from array import array
+from bisect import bisect
+from functools import partial
+from itertools import chain
+
+from uhashring.compact import CompactRing, owners_typecode
+
+
+class Lookup:
+    """Specialised lookup functions bound to a published continuum.
+
+    The owner of every position of the continuum is stored as an index into
+    the node names table, followed by the owner of the first position so
+    that the end of the continuum wraps around without a test. Each node
+    field gets its own table indexed the same way, so a lookup is one hash,
+    one search and one index with every value bound as a local. The owners
+    are stored in a typed array so that they take one or two bytes per
+    position, like the owners of a compact continuum.
+
+    When metrics are given, the lookup functions are instrumented by the
+    RingMetrics instead, the other lookup functions are left untouched.
+
+    When nodes are down, the owner of a position is the first owner which
+    is not down found when walking the continuum from this position.
+    """
+
+    __slots__ = (
+        "_get_pos",
+        "_hashi",
+        "_metrics",
+        "_names",
+        "_owners",
+        "continuum",
+        "dict",
+        "down",
+        "hostname",
+        "instance",
+        "nodename",
+        "port",
+        "server",
+        "weight",
+    )
+
+    def __init__(self, continuum, hashi, get_pos=None, metrics=None, down=frozenset()):
+        """Bind the lookup functions of the given continuum.
+
+        :param continuum: the published continuum.
+        :param hashi: the hash function of the continuum points.
+        :param get_pos: the position function of the runtimes which are not
+                        continuum based (or of the lookup cache), the keys
+                        are bisected in the continuum points otherwise.
+        :param metrics: the RingMetrics instrumenting the lookups, if any.
+        :param down: the names of the nodes which are down.
+        """
+        self.continuum = continuum
+        keys, ring = continuum.keys, continuum.ring
+        if isinstance(ring, CompactRing):
+            names = ring._names
+            # the owners may be an array or a memoryview of a snapshot
+            owners = array(getattr(ring._owners, "typecode", None) or ring._owners.format)
+            owners.frombytes(memoryview(ring._owners).cast("B"))
+        else:
+            names = []
+            index = {}
+            owners = array(owners_typecode(len(continuum.nodes)))
+            for key in keys:
+                nodename = ring[key]
+                if nodename not in index:
+                    index[nodename] = len(names)
+                    names.append(nodename)
+                owners.append(index[nodename])
+        if owners:
+            owners.append(owners[0])
+        self._get_pos = get_pos
+        self._hashi = hashi
+        self._metrics = metrics
+        self._names = names
+        self._owners = owners
+        self._bind_all(down)
+
+    def failover(self, down):
+        """Returns a Lookup of the same continuum skipping the given down
+        nodes, the owners table is shared so that no key is hashed and no
+        position is computed again.
+
+        :param down: the names of the nodes which are down.
+        """
+        lookup = Lookup.__new__(Lookup)
+        for attr in ("_get_pos", "_hashi", "_metrics", "_names", "_owners", "continuum"):
+            setattr(lookup, attr, getattr(self, attr))
+        lookup._bind_all(down)
+        return lookup
+
+    def _bind_all(self, down):
+        """Bind the lookup functions skipping the given down nodes.
+
+        :param down: the names of the nodes which are down.
+        """
+        self.down = down
+        continuum, hashi, get_pos = self.continuum, self._hashi, self._get_pos
+        metrics, names, owners = self._metrics, self._names, self._owners
+
+        find = None
+        find_pos = self._find_pos(continuum, hashi, get_pos)
+        down_indexes = {index for index, nodename in enumerate(names) if nodename in down}
+        if down_indexes:
+            if all(n in down for n, count in continuum.distribution.items() if count):
+                # every node is down
+                owners = []
+            else:
+                find_pos = self._find_live_pos(find_pos, owners, down_indexes)
+                find = self._find_live(find_pos, owners)
+        if find is None and metrics is not None and owners:
+            find = self._find(continuum, owners, hashi, get_pos)
+
+        hits = None
+        if find is None:
+            bind = partial(
+                self._bind, continuum=continuum, owners=owners, hashi=hashi, get_pos=get_pos
+            )
+        elif metrics is None:
+            bind = partial(self._bind_find, find)
+        else:
+            hits = metrics.bind_hits(names)
+            bind = partial(metrics.bind, find, hits)
+
+        confs = [continuum.nodes[nodename] for nodename in names]
+        self.dict = bind(confs)
+        self.nodename = bind(names)
+        for field in ("hostname", "instance", "port", "weight"):
+            setattr(self, field, bind([conf[field] for conf in confs]))
+        if hits is None:
+            self.server = self._bind_server(continuum.keys, names, owners, find_pos)
+        else:
+            self.server = metrics.bind_server(find_pos, hits, continuum.keys, owners)
+
+    @staticmethod
+    def _find_pos(continuum, hashi, get_pos):
+        """Returns the function of the position of a key, the position past
+        the last point being the wrap-around slot of the owners.
+
+        :param continuum: the published continuum.
+        :param hashi: the hash function of the continuum points.
+        :param get_pos: the position function or None to bisect the keys.
+        """
+        if get_pos is None:
+            keys = continuum.keys
+
+            def find_pos(key):
+                return bisect(keys, hashi(key))
+
+        else:
+
+            def find_pos(key):
+                return get_pos(key, continuum)
+
+        return find_pos
+
+    @staticmethod
+    def _find_live_pos(find_pos, owners, down_indexes):
+        """Returns the function of the position of the first owner which is
+        not down from the position of a key.
+
+        :param find_pos: returns the position of a key.
+        :param owners: the node index of every position.
+        :param down_indexes: the node indexes of the down nodes.
+        """
+        numpoints = len(owners) - 1
+
+        def find_live_pos(key):
+            pos = find_pos(key) % numpoints
+            if owners[pos] in down_indexes:
+                for pos in chain(range(pos + 1, numpoints), range(pos)):
+                    if owners[pos] not in down_indexes:
+                        break
+            return pos
+
+        return find_live_pos
+
+    @staticmethod
+    def _find(continuum, owners, hashi, get_pos):
+        """Returns the function of the node names table index of a key.
+
+        :param continuum: the published continuum.
+        :param owners: the node index of every position.
+        :param hashi: the hash function of the continuum points.
+        :param get_pos: the position function or None to bisect the keys.
+        """
+        if get_pos is None:
+            keys = continuum.keys
+
+            def find(key):
+                return owners[bisect(keys, hashi(key))]
+
+        else:
+
+            def find(key):
+                return owners[get_pos(key, continuum)]
+
+        return find
+
+    @staticmethod
+    def _find_live(find_live_pos, owners):
+        """Returns the function of the node names table index of the first
+        owner which is not down from the position of a key.
+
+        :param find_live_pos: returns the position of that owner.
+        :param owners: the node index of every position.
+        """
+
+        def find(key):
+            return owners[find_live_pos(key)]
+
+        return find
+
+    @staticmethod
+    def _bind_server(keys, names, owners, find_pos):
+        """Returns the lookup function of the ketama compatible (position,
+        nodename) tuple of a key.
+
+        :param keys: the sorted points of the continuum.
+        :param names: the node names table.
+        :param owners: the node index of every position.
+        :param find_pos: returns the position of a key.
+        """
+        numpoints = len(keys)
+        if not owners:
+
+            def server(key):
+                return None
+
+        else:
+
+            def server(key):
+                pos = find_pos(key)
+                if pos == numpoints:
+                    pos = 0
+                return (keys[pos], names[owners[pos]])
+
+        return server
+
+    @staticmethod
+    def _bind_find(find, values):
+        """Returns the lookup function of the given values table.
+
+        :param find: returns the node names table index of a key.
+        :param values: the value of every node of the node names table.
+        """
+
+        def lookup(key):
+            return values[find(key)]
+
+        return lookup
+
+    @staticmethod
+    def _bind(values, continuum, owners, hashi, get_pos):
+        """Returns the lookup function of the given values table.
+
+        :param values: the value of every node of the node names table.
+        :param continuum: the published continuum.
+        :param owners: the node index of every position.
+        :param hashi: the hash function of the continuum points.
+        :param get_pos: the position function or None to bisect the keys.
+        """
+        if not owners:
+
+            def lookup(key):
+                return None
+
+        elif get_pos is None:
+            keys = continuum.keys
+
+            def lookup(key):
+                return values[owners[bisect(keys, hashi(key))]]
+
+        else:
+
+            def lookup(key):
+                return values[owners[get_pos(key, continuum)]]
+
+        return lookup
@@ -0,0 +1,202 @@
+from collections import Counter, namedtuple
+from time import perf_counter
+
+RebuildEvent = namedtuple("RebuildEvent", ["operation", "duration", "points", "nodes"])
+RebuildEvent.__doc__ = """A continuum rebuild.
+
+- operation: the runtime operation (create_ring, update_ring, remove_node).
+- duration: the wall time of the rebuild in seconds.
+- points: the number of points (or positions) of the new continuum.
+- nodes: the number of nodes of the new continuum.
+"""
+
+LookupSample = namedtuple("LookupSample", ["key", "nodename", "duration"])
+LookupSample.__doc__ = """A sampled lookup.
+
+- key: the key looked for.
+- nodename: the name of the node matching the key.
+- duration: the wall time of the lookup in seconds.
+"""
+
+
+class RingMetrics:
+    """Opt-in instrumentation of a HashRing.
+
+    The lookups of every node are counted and every rebuild of the
+    continuum is timed. The on_rebuild callback is called with the
+    RebuildEvent of every rebuild and the on_lookup_sample callback with
+    the LookupSample of one lookup out of sample_interval lookups, so
+    that only sampled lookups are timed.
+
+    Rings created without metrics use lookup functions which are not
+    instrumented at all.
+    """
+
+    def __init__(self, on_rebuild=None, on_lookup_sample=None, sample_interval=100):
+        """Create new metrics.
+
+        :param on_rebuild: called with the RebuildEvent of every rebuild.
+        :param on_lookup_sample: called with the LookupSample of one lookup
+                                 out of sample_interval lookups.
+        :param sample_interval: the number of lookups per sampled lookup.
+        """
+        for callback in (on_rebuild, on_lookup_sample):
+            if callback is not None and not hasattr(callback, "__call__"):
+                raise TypeError("metrics callbacks should be callable functions")
+        if sample_interval < 1:
+            raise ValueError("sample_interval should be greater than or equal to 1")
+        self._on_rebuild = on_rebuild
+        self._on_lookup_sample = on_lookup_sample
+        self._sample_interval = sample_interval
+        self._countdown = sample_interval
+        self._counts = Counter()
+        self._hits = ([], [])
+        self.reset()
+
+    def reset(self):
+        """Reset the lookup counters and rebuild statistics."""
+        self._counts.clear()
+        hits = self._hits[1]
+        hits[:] = [0] * len(hits)
+        self.last_rebuild = None
+        self.rebuilds = 0
+        self.rebuild_duration = 0.0
+
+    def bind_hits(self, names):
+        """Returns a new list of the lookup counters of the given node names
+        table, the counters of the previous table are folded into the
+        lookups counter.
+
+        Counting in a list indexed like the node names table is much cheaper
+        than counting in a Counter on every lookup.
+
+        :param names: the node names table.
+        """
+        self._fold()
+        hits = [0] * len(names)
+        self._hits = (names, hits)
+        return hits
+
+    def bind(self, find, hits, values):
+        """Returns an instrumented lookup function.
+
+        :param find: returns the node names table index of a key.
+        :param hits: the lookup counters of the node names table.
+        :param values: the value of every node of the node names table.
+        """
+        on_lookup_sample = self._on_lookup_sample
+
+        if on_lookup_sample is None:
+
+            def lookup(key):
+                index = find(key)
+                hits[index] += 1
+                return values[index]
+
+            return lookup
+
+        names = self._hits[0]
+
+        def lookup(key):
+            self._countdown -= 1
+            if self._countdown:
+                index = find(key)
+                hits[index] += 1
+                return values[index]
+            self._countdown = self._sample_interval
+            start = perf_counter()
+            index = find(key)
+            duration = perf_counter() - start
+            hits[index] += 1
+            on_lookup_sample(LookupSample(key, names[index], duration))
+            return values[index]
+
+        return lookup
+
+    def bind_server(self, find_pos, hits, keys, owners):
+        """Returns the instrumented lookup function of the ketama compatible
+        (position, nodename) tuple of a key.
+
+        :param find_pos: returns the position of a key.
+        :param hits: the lookup counters of the node names table.
+        :param keys: the sorted points of the continuum.
+        :param owners: the node names table index of every position.
+        """
+        on_lookup_sample = self._on_lookup_sample
+        names = self._hits[0]
+        numpoints = len(keys)
+
+        if on_lookup_sample is None:
+
+            def server(key):
+                pos = find_pos(key)
+                if pos == numpoints:
+                    pos = 0
+                index = owners[pos]
+                hits[index] += 1
+                return (keys[pos], names[index])
+
+            return server
+
+        def server(key):
+            self._countdown -= 1
+            if self._countdown:
+                pos = find_pos(key)
+            else:
+                self._countdown = self._sample_interval
+                start = perf_counter()
+                pos = find_pos(key)
+                duration = perf_counter() - start
+                on_lookup_sample(LookupSample(key, names[owners[pos]], duration))
+            if pos == numpoints:
+                pos = 0
+            index = owners[pos]
+            hits[index] += 1
+            return (keys[pos], names[index])
+
+        return server
+
+    def _fold(self):
+        """Fold the counters of the current node names table into the
+        lookups counter."""
+        names, hits = self._hits
+        for nodename, count in zip(names, hits):
+            if count:
+                self._counts[nodename] += count
+        hits[:] = [0] * len(hits)
+
+    def count(self, nodenames):
+        """Count the lookups of the given node names.
+
+        :param nodenames: an iterable of the node names looked up.
+        """
+        self._counts.update(nodenames)
+
+    def record_rebuild(self, operation, duration, continuum):
+        """Record the rebuild of the given continuum.
+
+        :param operation: the runtime operation which rebuilt the continuum.
+        :param duration: the wall time of the rebuild in seconds.
+        :param continuum: the published continuum.
+        """
+        event = RebuildEvent(operation, duration, len(continuum.keys), len(continuum.nodes))
+        self.last_rebuild = event
+        self.rebuilds += 1
+        self.rebuild_duration += duration
+        if self._on_rebuild is not None:
+            self._on_rebuild(event)
+
+    @property
+    def lookups(self):
+        """Returns the counter of the lookups of every node."""
+        names, hits = self._hits
+        lookups = self._counts.copy()
+        for nodename, count in zip(names, hits):
+            if count:
+                lookups[nodename] += count
+        return lookups
+
+    @property
+    def lookup_total(self):
+        """Returns the total number of counted lookups."""
+        return sum(self._counts.values()) + sum(self._hits[1])
@@ -3,9 +3,16 @@ from uhashring import HashRing
 __all__ = ["patch_memcache"]
 
 
-def patch_memcache():
+def patch_memcache(client_class=None):
     """Monkey patch python-memcached to implement our consistent hashring
     in its node selection and operations.
+
+    The multi keys operations (get_multi, set_multi, delete_multi...)
+    partition their keys in one batch so that every server gets a single
+    request, the keys of a server which can't be connected to are mapped one
+    at a time to the next available server.
+
+    :param client_class: the client class to patch (default memcache.Client).
     """
 
     def _init(self, servers, *k, **kw):
@@ -33,8 +40,53 @@ def patch_memcache():
 
         return None, None
 
-    memcache = __import__("memcache")
-    memcache.Client._old_get_server = memcache.Client._get_server
-    memcache.Client._old_init = memcache.Client.__init__
-    memcache.Client.__init__ = _init
-    memcache.Client._get_server = _get_server
+    def _map_and_prefix_keys(self, key_iterable, key_prefix):
+        key_iterable = list(key_iterable)
+        # the keys with an explicit server hash are mapped by python-memcached
+        server_keys, prefixed_to_orig_key = self._old_map_and_prefix_keys(
+            [key for key in key_iterable if isinstance(key, tuple)], key_prefix
+        )
+
+        key_prefix = self._encode_key(key_prefix)
+        key_extra_len = len(key_prefix)
+        prefixed_keys = {}
+        for orig_key in key_iterable:
+            if isinstance(orig_key, tuple):
+                continue
+            key = self._encode_key(self.key_encoder(orig_key))
+            if not isinstance(key, bytes):
+                # set_multi supports int keys
+                key = str(key).encode("utf8")
+            if orig_key is None:
+                self.check_key(orig_key, key_extra_len=key_extra_len)
+            if self.do_check_key:
+                self.check_key(key, key_extra_len=key_extra_len)
+            prefixed_keys[key_prefix + key] = orig_key
+
+        nodes = self.uhashring.nodes
+        for nodename, keys in self.uhashring.partition(prefixed_keys).items():
+            server = nodes[nodename]["instance"]
+            if server.connect():
+                server_keys.setdefault(server, []).extend(keys)
+                for key in keys:
+                    prefixed_to_orig_key[key] = prefixed_keys[key]
+                continue
+            for key in keys:
+                server, _ = self._get_server(key)
+                if server:
+                    server_keys.setdefault(server, []).append(key)
+                    prefixed_to_orig_key[key] = prefixed_keys[key]
+
+        return server_keys, prefixed_to_orig_key
+
+    if client_class is None:
+        client_class = __import__("memcache").Client
+    if hasattr(client_class, "_uhashring_patched"):
+        return
+    client_class._uhashring_patched = True
+    client_class._old_get_server = client_class._get_server
+    client_class._old_init = client_class.__init__
+    client_class._old_map_and_prefix_keys = client_class._map_and_prefix_keys
+    client_class.__init__ = _init
+    client_class._get_server = _get_server
+    client_class._map_and_prefix_keys = _map_and_prefix_keys
@@ -0,0 +1,67 @@
+from collections import Counter, namedtuple
+from math import sqrt
+
+from uhashring.planner import iter_arcs
+
+Ownership = namedtuple("Ownership", ["shares", "stddev", "imbalance", "keyspace"])
+Ownership.__doc__ = """The exact keyspace ownership of a continuum.
+
+- shares: the fraction of the keyspace owned by every node.
+- stddev: the standard deviation of the shares over the weighted ideal
+  shares of the nodes, 0 for a perfect balance.
+- imbalance: the largest share over its weighted ideal share, which is the
+  max over mean share when the nodes have the same weight.
+- keyspace: the number of hashes (or positions) of the keyspace.
+"""
+
+
+def get_shares(continuum, keyspace=None, keyspace_start=0):
+    """Returns the fraction of the keyspace owned by every node of the
+    given continuum.
+
+    The continuum based shares are the sum of the arc lengths of the node
+    points, a hash being owned by the first point greater than it and the
+    hashes past the last point wrapping around to the first one. When no
+    keyspace is given, every position of the continuum (a jump bucket or a
+    Maglev table entry) owns the same share.
+
+    :param continuum: the published continuum.
+    :param keyspace: the number of hashes of the keyspace.
+    :param keyspace_start: the smallest hash of the keyspace.
+    """
+    shares = dict.fromkeys(continuum.nodes, 0.0)
+    if keyspace is None:
+        numpoints = len(continuum.keys)
+        for nodename, count in continuum.distribution.items():
+            shares[nodename] = count / numpoints
+        return shares
+    lengths = Counter()
+    for start, end, nodename, _ in iter_arcs(continuum, continuum, keyspace, keyspace_start):
+        lengths[nodename] += end - start
+    for nodename, length in lengths.items():
+        shares[nodename] = length / keyspace
+    return shares
+
+
+def get_ownership(continuum, keyspace=None, keyspace_start=0):
+    """Returns the Ownership of the given continuum.
+
+    The shares are compared to the weighted ideal shares of the nodes,
+    nodes without weight are left out of the imbalance metrics.
+
+    :param continuum: the published continuum.
+    :param keyspace: the number of hashes of the keyspace, see get_shares.
+    :param keyspace_start: the smallest hash of the keyspace.
+    """
+    shares = get_shares(continuum, keyspace, keyspace_start)
+    nodes = continuum.nodes
+    weight_sum = sum(nodes[nodename]["weight"] for nodename in shares)
+    ratios = [
+        share * weight_sum / nodes[nodename]["weight"]
+        for nodename, share in shares.items()
+        if nodes[nodename]["weight"] > 0
+    ]
+    if not ratios:
+        return Ownership(shares, 0.0, 0.0, keyspace or len(continuum.keys))
+    stddev = sqrt(sum((ratio - 1) ** 2 for ratio in ratios) / len(ratios))
+    return Ownership(shares, stddev, max(ratios), keyspace or len(continuum.keys))
@@ -0,0 +1,139 @@
+from collections import Counter, namedtuple
+
+from uhashring.hashes import get_hash_bits, get_hash_fn_name
+from uhashring.ring_ketama import KetamaRing
+from uhashring.ring_lazy import LazyRing
+from uhashring.ring_meta import MetaRing
+from uhashring.ring_shared import SharedRing
+
+MovedArc = namedtuple("MovedArc", ["start", "end", "old_node", "new_node"])
+
+MovePlan = namedtuple("MovePlan", ["arcs", "moved", "keyspace"])
+MovePlan.__doc__ = """The keyspace movement between two continuums.
+
+- arcs: the list of the MovedArc of hashes in [start, end) changing owner.
+- moved: the fraction of the keyspace moved per (old_node, new_node) pair.
+- keyspace: the number of hashes of the keyspace.
+"""
+
+
+def get_hash_name(runtime):
+    """Returns the name (or the function when it is not registered) of the
+    hash function placing the points of the given continuum based runtime.
+
+    :param runtime: the MetaRing, KetamaRing, SharedRing or LazyRing.
+    """
+    if isinstance(runtime, LazyRing):
+        runtime = runtime._builder
+    if isinstance(runtime, SharedRing):
+        if runtime._builder is None:
+            return runtime._hash_name
+        runtime = runtime._builder
+    if isinstance(runtime, KetamaRing):
+        return "ketama"
+    if isinstance(runtime, MetaRing):
+        return get_hash_fn_name(runtime._hash_fn) or runtime._hash_fn
+    raise ValueError("keyspace arcs are only supported by continuum based rings")
+
+
+def get_keyspace(hash_name, *continuums):
+    """Returns the number of hashes of the keyspace of the given hash
+    function, it is inferred from the largest point of the continuums
+    (32, 64, 128... bits) when the hash function is not known.
+
+    The keyspace of signed hash functions (like mmh3.hash) is centered on
+    0, see get_keyspace_start.
+
+    :param hash_name: the hash function name (or function).
+    :param continuums: the continuums placed by the hash function.
+    """
+    bits = get_hash_bits(hash_name) if isinstance(hash_name, str) else None
+    if bits is None:
+        points = [p for c in continuums if len(c.keys) for p in (c.keys[0], c.keys[-1])]
+        signed = any(p < 0 for p in points)
+        # ~p is the magnitude of a negative point over a signed keyspace
+        largest = max((~p if p < 0 else p for p in points), default=0)
+        bits = 32
+        while largest >> (bits - 1 if signed else bits):
+            bits *= 2
+    return 1 << bits
+
+
+def get_keyspace_start(keyspace, *continuums):
+    """Returns the smallest hash of the keyspace of the given continuums,
+    0 unless one of their points is negative, in which case the hashes
+    are signed and the keyspace is centered on 0.
+
+    :param keyspace: the number of hashes of the keyspace.
+    :param continuums: the continuums placed by the hash function.
+    """
+    if any(len(c.keys) and c.keys[0] < 0 for c in continuums):
+        return -(keyspace // 2)
+    return 0
+
+
+def iter_arcs(old, new, keyspace, keyspace_start=0):
+    """Yield the (start, end, old_node, new_node) arcs of hashes in
+    [start, end) covering the whole keyspace, old_node and new_node being
+    their owners in the given continuums.
+
+    The sorted points of both continuums are walked in a single merge pass,
+    a hash is owned by the first point greater than it and the hashes past
+    the last point wrap around to the first one.
+
+    :param old: the current continuum.
+    :param new: the proposed continuum.
+    :param keyspace: the number of hashes of the keyspace.
+    :param keyspace_start: the smallest hash of the keyspace.
+    """
+    old_keys, old_ring = old.keys, old.ring
+    new_keys, new_ring = new.keys, new.ring
+    old_len, new_len = len(old_keys), len(new_keys)
+    old_first = old_ring[old_keys[0]] if old_len else None
+    new_first = new_ring[new_keys[0]] if new_len else None
+
+    i = j = 0
+    start = keyspace_start
+    while i < old_len or j < new_len:
+        if j == new_len or (i < old_len and old_keys[i] <= new_keys[j]):
+            end = old_keys[i]
+        else:
+            end = new_keys[j]
+        if end > start:
+            yield (
+                start,
+                end,
+                old_ring[old_keys[i]] if i < old_len else old_first,
+                new_ring[new_keys[j]] if j < new_len else new_first,
+            )
+        # skip the points at the arc end, including colliding points
+        while i < old_len and old_keys[i] == end:
+            i += 1
+        while j < new_len and new_keys[j] == end:
+            j += 1
+        start = end
+    keyspace_end = keyspace_start + keyspace
+    if (old_len or new_len) and keyspace_end > start:
+        yield start, keyspace_end, old_first, new_first
+
+
+def plan_moves(old, new, keyspace, keyspace_start=0):
+    """Returns the MovePlan of the keyspace between the given continuums,
+    adjacent moved arcs between the same nodes are merged.
+
+    :param old: the current continuum.
+    :param new: the proposed continuum.
+    :param keyspace: the number of hashes of the keyspace.
+    :param keyspace_start: the smallest hash of the keyspace.
+    """
+    arcs = []
+    moved = Counter()
+    for start, end, old_node, new_node in iter_arcs(old, new, keyspace, keyspace_start):
+        if old_node == new_node:
+            continue
+        moved[(old_node, new_node)] += end - start
+        if arcs and arcs[-1][1] == start and arcs[-1][2:] == (old_node, new_node):
+            arcs[-1] = MovedArc(arcs[-1].start, end, old_node, new_node)
+        else:
+            arcs.append(MovedArc(start, end, old_node, new_node))
+    return MovePlan(arcs, {pair: size / keyspace for pair, size in moved.items()}, keyspace)
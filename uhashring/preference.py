@@ -0,0 +1,88 @@
+from array import array
+
+from uhashring.compact import CompactRing
+
+
+class PreferenceTable:
+    """Precomputed preference lists of a continuum.
+
+    The table holds the next distinct owners of every position of the
+    continuum as indexes into a table of node names, a row holds at most
+    size node indexes and ends with the None sentinel index when the
+    continuum has less distinct owners.
+    """
+
+    __slots__ = ("_names", "_size", "_table")
+
+    def __init__(self, continuum, size):
+        """Build the preference lists of the given continuum.
+
+        The positions are walked backwards, the preference list of a
+        position being its owner followed by the preference list of the
+        next position without this owner. A first pass computes the exact
+        preference list of the first position which is then used to wrap
+        around on the second pass, stopping as soon as a preference list is
+        the same as the one found on the first pass.
+
+        :param continuum: the published continuum.
+        :param size: the number of distinct nodes of every preference list.
+        """
+        keys, ring = continuum.keys, continuum.ring
+        if isinstance(ring, CompactRing):
+            names = list(ring._names)
+            owners = ring._owners
+        else:
+            names = []
+            index = {}
+            owners = []
+            for key in keys:
+                nodename = ring[key]
+                if nodename not in index:
+                    index[nodename] = len(names)
+                    names.append(nodename)
+                owners.append(index[nodename])
+        sentinel = len(names)
+        names.append(None)
+
+        rows = [None] * len(keys)
+        successors = []
+        for wrap in (False, True):
+            for pos in range(len(keys) - 1, -1, -1):
+                owner = owners[pos]
+                row = [owner]
+                for successor in successors:
+                    if len(row) == size:
+                        break
+                    if successor != owner:
+                        row.append(successor)
+                if wrap and row == rows[pos]:
+                    break
+                rows[pos] = successors = row
+            if rows:
+                successors = rows[0]
+
+        typecode = "B" if sentinel < 1 << 8 else "H" if sentinel < 1 << 16 else "L"
+        table = array(typecode)
+        for row in rows:
+            table.extend(row)
+            table.extend([sentinel] * (size - len(row)))
+        self._names = names
+        self._size = size
+        self._table = table
+
+    def get(self, pos, size):
+        """Returns the first size node names of the preference list of the
+        given position.
+
+        :param pos: the index in the sorted key list.
+        :param size: the number of node names, at most the table size.
+        """
+        names = self._names
+        sentinel = len(names) - 1
+        start = pos * self._size
+        nodenames = []
+        for index in self._table[start : start + min(size, self._size)]:
+            if index == sentinel:
+                break
+            nodenames.append(names[index])
+        return nodenames
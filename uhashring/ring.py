@@ -1,7 +1,25 @@
 from bisect import bisect
-
+from collections import Counter
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import chain, islice
+from math import ceil
+from time import perf_counter
+
+from uhashring.batch import Batch, RingUpdate
+from uhashring.lookup import Lookup
+from uhashring.metrics import RingMetrics
+from uhashring.ownership import get_ownership
+from uhashring.planner import get_hash_name, get_keyspace, get_keyspace_start, plan_moves
+from uhashring.preference import PreferenceTable
+from uhashring.ring_jump import JumpRing
 from uhashring.ring_ketama import KetamaRing
+from uhashring.ring_lazy import LazyRing
+from uhashring.ring_maglev import MaglevRing
 from uhashring.ring_meta import MetaRing
+from uhashring.ring_shared import SharedRing
+from uhashring.route import route_stream
+from uhashring.snapshot import load_snapshot, restore_runtime, save_snapshot
 
 
 class HashRing:
@@ -11,40 +29,150 @@ class HashRing:
         """Create a new HashRing given the implementation.
 
         :param nodes: nodes used to create the continuum (see doc for format).
+        :param algorithm: the consistent hashing algorithm, can be set to
+                          'jump' to use the jump consistent hash algorithm
+                          or to 'maglev' to use a Maglev lookup table, in
+                          which vnodes are not used.
         :param hash_fn: use this callable function to hash keys, can be set to
-                        'ketama' to use the ketama compatible implementation.
+                        'ketama' to use the ketama compatible implementation
+                        or to the name of a registered hash function (like
+                        'md5_64', 'blake2b_64', 'xxh3_64' or 'mmh3_128').
         :param vnodes: default number of vnodes per node.
         :param weight_fn: use this function to calculate the node's weight.
+        :param compact: store the continuum points in typed arrays and their
+                        owners as indexes into a node names table to reduce
+                        the memory footprint of the ring.
+        :param lookup_cache: cache the ring position of up to this number of
+                             most recently used keys.
+        :param table_size: the prime size of the Maglev lookup table.
+        :param load_factor: the capacity factor of the nodes used by the
+                            bounded loads lookups (default 1.25).
+        :param preference_list: precompute the next N distinct nodes of every
+                                continuum position so that range and
+                                iterate_nodes lookups of up to N nodes do
+                                not walk the continuum.
+        :param lazy: only mark the ring dirty on nodes changes and build the
+                     continuum on the first lookup, consecutive changes are
+                     coalesced into a single build (not supported with
+                     shared_memory).
+        :param shared_memory: publish the continuum in shared memory segments
+                              prefixed by this name so that other processes
+                              can use it, see from_shared_memory.
+        :param metrics: count the lookups of every node and time the rebuilds
+                        of the continuum, see the metrics property.
+        :param on_rebuild: call this function with the RebuildEvent of every
+                           rebuild of the continuum (enables metrics).
+        :param on_lookup_sample: call this function with the LookupSample of
+                                 one lookup out of lookup_sample_interval
+                                 lookups (enables metrics).
+        :param lookup_sample_interval: the number of lookups per sampled
+                                       lookup (default 100).
         """
+        algorithm = kwargs.get("algorithm", None)
+        compact = kwargs.get("compact", False)
         hash_fn = kwargs.get("hash_fn", None)
+        lazy = kwargs.get("lazy", False)
+        load_factor = kwargs.get("load_factor", 1.25)
+        lookup_cache = kwargs.get("lookup_cache", None)
+        metrics = kwargs.get("metrics", False)
+        on_lookup_sample = kwargs.get("on_lookup_sample", None)
+        on_rebuild = kwargs.get("on_rebuild", None)
+        preference_list = kwargs.get("preference_list", None)
+        shared_memory = kwargs.get("shared_memory", None)
         vnodes = kwargs.get("vnodes", None)
         weight_fn = kwargs.get("weight_fn", None)
+        self._kwargs = kwargs
 
-        if hash_fn == "ketama":
-            ketama_args = {k: v for k, v in kwargs.items() if k in ("replicas",)}
-            if vnodes is None:
-                vnodes = 40
-            self.runtime = KetamaRing(**ketama_args)
-        else:
-            if vnodes is None:
-                vnodes = 160
-            self.runtime = MetaRing(hash_fn)
-
-        self._default_vnodes = vnodes
-        self.hashi = self.runtime.hashi
+        # the options are validated before any shared memory segment exists
+        if load_factor < 1:
+            raise ValueError("load_factor should be greater than or equal to 1")
+        self._load_factor = load_factor
+        self._loads = Counter()
+        self._loads_total = 0
+        self._weight_sum = (None, 0)
 
         if weight_fn and not hasattr(weight_fn, "__call__"):
             raise TypeError("weight_fn should be a callable function")
         self._weight_fn = weight_fn
 
-        if self._configure_nodes(nodes):
-            self.runtime._create_ring(self.runtime._nodes.items())
+        self._metrics = None
+        if metrics or on_rebuild or on_lookup_sample:
+            self._metrics = RingMetrics(
+                on_rebuild, on_lookup_sample, kwargs.get("lookup_sample_interval", 100)
+            )
+
+        if algorithm == "jump":
+            self.runtime = JumpRing(hash_fn)
+        elif algorithm == "maglev":
+            self.runtime = MaglevRing(hash_fn, table_size=kwargs.get("table_size", 65537))
+        elif algorithm is not None:
+            raise ValueError("unknown algorithm '{}'".format(algorithm))
+        elif hash_fn == "ketama":
+            ketama_args = {k: v for k, v in kwargs.items() if k in ("replicas",)}
+            if vnodes is None:
+                vnodes = 40
+            self.runtime = KetamaRing(compact=compact, **ketama_args)
+        else:
+            self.runtime = MetaRing(hash_fn, compact=compact)
+
+        if shared_memory is not None:
+            if algorithm is not None:
+                raise ValueError("shared_memory is only supported by continuum based rings")
+            # readers only see the continuums published by the coordinator
+            if lazy:
+                raise ValueError("shared_memory rings can not be lazy")
+            self.runtime = SharedRing(shared_memory, self.runtime)
+
+        # the nodes changes of a lazy ring exclude the builds of its lookups
+        self._changing = nullcontext()
+        if lazy:
+            self.runtime = LazyRing(self.runtime, self._rebuild)
+            self._changing = self.runtime._lock
+
+        self._default_vnodes = 160 if vnodes is None else vnodes
+        self._bind_runtime()
+        self._down = frozenset()
+        self._lookup = None
+        self._np_points = (None, None)
+        self._preference_list = preference_list
+        self._preference_table = (None, None)
+
+        self._lookup_cache = None
+        if lookup_cache:
+            self._lookup_cache_size = lookup_cache
+            self._lookup_cache_stats = (0, 0)
+            self._bind_lookup_cache(None)
+
+        try:
+            if self._configure_nodes(nodes):
+                self._rebuild(self.runtime._create_ring, self.runtime._nodes.items())
+        except BaseException:
+            # do not leak the segments of a shared ring which failed to start
+            if shared_memory is not None:
+                self.runtime.unlink()
+            raise
+
+    def _bind_runtime(self):
+        """Bind the hash and lookup functions of the runtime."""
+        self.hashi = self.runtime.hashi
+        # runtimes which are not continuum based map keys to their own positions
+        if hasattr(self.runtime, "_get_pos"):
+            self._find_pos = self.runtime._get_pos
+            self._get_pos_many = self.runtime._get_pos_many
+
+    def _require_builder(self):
+        """Raise TypeError when the nodes of the runtime can not be changed,
+        like the ones of shared ring readers."""
+        require_builder = getattr(self.runtime, "_require_builder", None)
+        if require_builder is not None:
+            require_builder()
 
     def _configure_nodes(self, nodes):
         """Parse and set up the given nodes.
 
         :param nodes: nodes used to create the continuum (see doc for format).
         """
+        self._require_builder()
         if isinstance(nodes, str):
             nodes = [nodes]
         elif not isinstance(nodes, (dict, list)):
@@ -98,7 +226,10 @@ class HashRing:
 
         :param nodename: the node name.
         """
-        self.runtime._remove_node(nodename)
+        self._rebuild(self.runtime._remove_node, nodename)
+        self._loads_total -= self._loads.pop(nodename, 0)
+        if nodename in self._down:
+            self._down = self._down - {nodename}
 
     remove_node = __delitem__
 
@@ -107,7 +238,7 @@ class HashRing:
 
         :param key: the key to look for.
         """
-        return self._get(key, "instance")
+        return self._get_lookup().instance(key)
 
     get_node_instance = __getitem__
 
@@ -117,26 +248,249 @@ class HashRing:
         :param nodename: the node name.
         :param conf: the node configuration.
         """
-        if self._configure_nodes({nodename: conf}):
-            self.runtime._create_ring([(nodename, self._nodes[nodename])])
+        with self._changing:
+            if self._configure_nodes({nodename: conf}):
+                self._rebuild(self.runtime._update_ring, [(nodename, self._nodes[nodename])])
+            else:
+                # the continuum is unchanged but the node instance or
+                # port may have changed
+                self.runtime._update_nodes()
 
     add_node = __setitem__
 
-    def _get_pos(self, key):
+    def _get_pos(self, key, continuum):
         """Get the index of the given key in the sorted key list.
 
         We return the position with the nearest hash based on
         the provided key unless we reach the end of the continuum/ring
         in which case we return the 0 (beginning) index position.
 
+        When the lookup cache is enabled, it is bound to the given continuum
+        and is replaced as soon as another continuum is published.
+
+        :param key: the key to hash and look for.
+        :param continuum: the published continuum to look into.
+        """
+        if self._lookup_cache is not None:
+            cache_continuum, cache = self._lookup_cache
+            if cache_continuum is not continuum:
+                cache = self._bind_lookup_cache(continuum)
+            try:
+                return cache(key)
+            except TypeError:
+                # unhashable key
+                pass
+        return self._find_pos(key, continuum)
+
+    def _bind_lookup_cache(self, continuum):
+        """Returns a new lookup cache bound to the given continuum, it is
+        published with a single reference swap like the continuum.
+
+        :param continuum: the published continuum to look into.
+        """
+        if self._lookup_cache is not None:
+            hits, misses = self._lookup_cache_stats
+            info = self._lookup_cache[1].cache_info()
+            self._lookup_cache_stats = (hits + info.hits, misses + info.misses)
+
+        find_pos = self._find_pos
+
+        @lru_cache(maxsize=self._lookup_cache_size, typed=True)
+        def cache(key):
+            return find_pos(key, continuum)
+
+        self._lookup_cache = (continuum, cache)
+        return cache
+
+    def _find_pos(self, key, continuum):
+        """Hash the given key and bisect its position in the sorted key list.
+
         :param key: the key to hash and look for.
+        :param continuum: the published continuum to look into.
         """
-        p = bisect(self.runtime._keys, self.hashi(key))
-        if p == len(self.runtime._keys):
+        p = bisect(continuum.keys, self.hashi(key))
+        if p == len(continuum.keys):
             return 0
         else:
             return p
 
+    def _get_pos_many(self, keys, continuum):
+        """Get the index of every given key in the sorted key list.
+
+        This is the batch counterpart of _get_pos, positions are resolved
+        with a single numpy searchsorted call over the continuum when numpy
+        is available and both the points and the hashes are unsigned 64 bits
+        integers, otherwise we fall back to bisect.
+
+        :param keys: a list of keys to hash and look for.
+        :param continuum: the published continuum to look into.
+        """
+        hashi = self.hashi
+        hashes = [hashi(key) for key in keys]
+        _keys = continuum.keys
+        numpoints = len(_keys)
+        points = self._get_np_points(_keys)
+        if points is not None and hashes and min(hashes) >= 0:
+            import numpy as np
+
+            try:
+                hashes_array = np.array(hashes, dtype=np.uint64)
+            except (OverflowError, TypeError, ValueError):
+                pass
+            else:
+                positions = np.searchsorted(points, hashes_array, side="right")
+                positions[positions == numpoints] = 0
+                return positions.tolist()
+        return [bisect(_keys, h) % numpoints for h in hashes]
+
+    def _get_np_points(self, _keys):
+        """Returns the given continuum points as a numpy uint64 array.
+
+        The array is cached until the continuum changes, None is returned
+        when numpy is not available or the points can't fit in an uint64:
+        older numpy releases silently wrap negative points around so signed
+        keyspaces always fall back to bisect.
+        numpy is only imported on first use so that importing uhashring
+        stays fast.
+
+        :param _keys: the sorted points of the continuum.
+        """
+        source, points = self._np_points
+        if source is not _keys:
+            points = None
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+            else:
+                try:
+                    if _keys and _keys[0] >= 0:
+                        points = np.array(_keys, dtype=np.uint64)
+                except (OverflowError, TypeError, ValueError):
+                    pass
+            self._np_points = (_keys, points)
+        return points
+
+    def _get_live_pos(self, continuum, pos):
+        """Returns the position of the first node which is not down found
+        when walking the continuum/ring from the given position, None when
+        all the nodes are down.
+
+        :param continuum: the published continuum to walk.
+        :param pos: the index in the sorted key list to start from.
+        """
+        down = self._down
+        _keys = continuum.keys
+        _ring = continuum.ring
+        for i in chain(range(pos, len(_keys)), range(pos)):
+            if _ring[_keys[i]] not in down:
+                return i
+        return None
+
+    def _get_lookup(self):
+        """Returns the Lookup functions of the current continuum, they are
+        bound on first use after every continuum change and rebound without
+        computing the positions again when nodes are marked down or up."""
+        continuum = self.runtime._continuum
+        down = self._down
+        lookup = self._lookup
+        if lookup is None or lookup.continuum is not continuum:
+            if self._lookup_cache is not None:
+                get_pos = self._get_pos
+            elif hasattr(self.runtime, "_get_pos"):
+                get_pos = self.runtime._get_pos
+            else:
+                get_pos = None
+            hashi = getattr(self.runtime, "_hash_fn", None) or self.hashi
+            lookup = self._lookup = Lookup(continuum, hashi, get_pos, self._metrics, down)
+        elif lookup.down is not down:
+            lookup = self._lookup = lookup.failover(down)
+        return lookup
+
+    def _rebuild(self, operation, *args):
+        """Call the given runtime operation and record the rebuild of the
+        continuum when the metrics are enabled.
+
+        The operations of a lazy ring only record the changes, it calls
+        back with the operation of its runtime when building the continuum.
+
+        :param operation: the runtime method rebuilding the continuum.
+        :param args: the runtime method arguments.
+        """
+        if self._metrics is None or isinstance(operation.__self__, LazyRing):
+            operation(*args)
+            return
+        start = perf_counter()
+        operation(*args)
+        duration = perf_counter() - start
+        self._metrics.record_rebuild(
+            operation.__name__.lstrip("_"), duration, self.runtime._continuum
+        )
+
+    def _get_other_ring(self, other, **overrides):
+        """Returns the given HashRing or a new HashRing configured like this
+        one with the given nodes configuration.
+
+        :param other: the HashRing or the nodes configuration.
+        :param overrides: the HashRing parameters to change.
+        """
+        if isinstance(other, HashRing):
+            return other
+        # the other ring is neither shared nor instrumented
+        excluded = ("metrics", "on_lookup_sample", "on_rebuild", "shared_memory")
+        kwargs = {k: v for k, v in self._kwargs.items() if k not in excluded}
+        kwargs.update(overrides)
+        return HashRing(other, **kwargs)
+
+    def _get_preference_table(self, continuum):
+        """Returns the PreferenceTable of the given continuum, it is built
+        on first use after every continuum change, None is returned when
+        the preference lists are not enabled.
+
+        :param continuum: the published continuum.
+        """
+        if not self._preference_list:
+            return None
+        source, table = self._preference_table
+        if source is not continuum:
+            table = PreferenceTable(continuum, self._preference_list)
+            self._preference_table = (continuum, table)
+        return table
+
+    def _get_bounded(self, key):
+        """Returns the name of the first node under its load capacity found
+        when walking the continuum/ring from the given key.
+
+        The capacity of a node is its weighted share of the total load
+        (including the key being placed) multiplied by the load factor,
+        rounded up, as described in "Consistent Hashing with Bounded Loads"
+        by Mirrokni, Thorup and Zadimoghaddam.
+
+        :param key: the key to look for.
+        """
+        continuum = self.runtime._continuum
+        if not continuum.ring:
+            return None
+
+        _loads = self._loads
+        _nodes = continuum.nodes
+        factor = self._load_factor * (self._loads_total + 1) / self._get_weight_sum(continuum)
+        for nodename in self._walk(continuum, self._get_pos(key, continuum)):
+            if _loads[nodename] < ceil(factor * _nodes[nodename]["weight"]):
+                return nodename
+
+    def _get_weight_sum(self, continuum):
+        """Returns the total weight of the nodes of the given continuum,
+        cached until the continuum changes.
+
+        :param continuum: the published continuum.
+        """
+        source, weight_sum = self._weight_sum
+        if source is not continuum:
+            weight_sum = sum(conf["weight"] for conf in continuum.nodes.values())
+            self._weight_sum = (continuum, weight_sum)
+        return weight_sum
+
     def _get(self, key, what):
         """Generic getter magic method.
 
@@ -150,29 +504,176 @@ class HashRing:
             - tuple: ketama compatible (pos, name) tuple
             - weight: node weight
         """
-        if not self.runtime._ring:
+        # the continuum is read once so that concurrent ring changes
+        # can't be observed during the lookup
+        continuum = self.runtime._continuum
+        if not continuum.ring:
             return None
 
-        pos = self._get_pos(key)
+        pos = self._get_pos(key, continuum)
+        if self._down:
+            pos = self._get_live_pos(continuum, pos)
+            if pos is None:
+                return None
         if what == "pos":
             return pos
 
-        nodename = self.runtime._ring[self.runtime._keys[pos]]
+        nodename = continuum.ring[continuum.keys[pos]]
+        if self._metrics is not None:
+            self._metrics.count([nodename])
         if what in ["hostname", "instance", "port", "weight"]:
-            return self.runtime._nodes[nodename][what]
+            return continuum.nodes[nodename][what]
         elif what == "dict":
-            return self.runtime._nodes[nodename]
+            return continuum.nodes[nodename]
         elif what == "nodename":
             return nodename
         elif what == "tuple":
-            return (self.runtime._keys[pos], nodename)
+            return (continuum.keys[pos], nodename)
+
+    def _walk(self, continuum, pos, size=None, unique=True):
+        """Returns a generator of the node names found when walking the
+        continuum/ring from the given position, skipping the down nodes.
+
+        When the preference lists are enabled, the first distinct node names
+        are read from the preference table of the continuum.
+
+        :param continuum: the published continuum to walk.
+        :param pos: the index in the sorted key list to start from.
+        :param size: limit the list to at most this number of nodes.
+        :param unique: a node may only appear once in the list (default True).
+        """
+        down = self._down
+        if down:
+            nodenames = self._walk_all(continuum, pos, None, unique)
+            return islice((n for n in nodenames if n not in down), size)
+        return self._walk_all(continuum, pos, size, unique)
+
+    def _walk_all(self, continuum, pos, size=None, unique=True):
+        """Returns a generator of the node names found when walking the
+        continuum/ring from the given position, see _walk.
+
+        :param continuum: the published continuum to walk.
+        :param pos: the index in the sorted key list to start from.
+        :param size: limit the list to at most this number of nodes.
+        :param unique: a node may only appear once in the list (default True).
+        """
+        if unique:
+            size = size or len(continuum.nodes)
+            all_nodes = set()
+            table = self._get_preference_table(continuum)
+            if table is not None:
+                nodenames = table.get(pos, size)
+                yield from nodenames
+                # the table is exhausted when the continuum has less owners
+                if len(nodenames) == size or len(nodenames) < table._size:
+                    return
+                all_nodes.update(nodenames)
+        else:
+            all_nodes = []
+
+        _keys = continuum.keys
+        _ring = continuum.ring
+        for i in chain(range(pos, len(_keys)), range(pos)):
+            nodename = _ring[_keys[i]]
+            if unique:
+                if nodename in all_nodes:
+                    continue
+                all_nodes.add(nodename)
+            else:
+                all_nodes.append(nodename)
+            yield nodename
+            if len(all_nodes) == size:
+                break
+
+    def acquire(self, key):
+        """Returns the name of the node under its load capacity matching
+        the hashed key and increments its load.
+
+        :param key: the key to look for.
+        """
+        nodename = self._get_bounded(key)
+        if nodename is not None:
+            self._loads[nodename] += 1
+            self._loads_total += 1
+        return nodename
+
+    def batch(self):
+        """Returns a context manager collecting the add_node, remove_node and
+        reweight calls made on it, they are applied with a single update
+        when the context exits, see update.
+        """
+        return Batch(self)
+
+    def count_moved_keys(self, other, keys):
+        """Returns the number of the given keys which are not mapped to the
+        same node name by the other ring.
+
+        This helps evaluating a migration from a ring configuration to
+        another (like changing the hash function).
+
+        :param other: the HashRing to compare with.
+        :param keys: an iterable of keys to look for.
+        """
+        keys = list(keys)
+        return sum(
+            nodename != other_nodename
+            for nodename, other_nodename in zip(
+                self.get_nodes_many(keys), other.get_nodes_many(keys)
+            )
+        )
+
+    @classmethod
+    def from_snapshot(cls, path, **kwargs):
+        """Returns a new HashRing loaded from the given snapshot file.
+
+        The snapshot is memory mapped read only and no key is hashed, the
+        nodes instances are not saved in snapshots and are set to None.
+
+        :param path: the snapshot file path.
+        :param kwargs: other HashRing parameters (like weight_fn).
+        """
+        return cls._from_snapshot(load_snapshot(path), **kwargs)
+
+    @classmethod
+    def _from_snapshot(cls, snapshot, **kwargs):
+        """Returns a new HashRing restored from the given parsed snapshot.
+
+        :param snapshot: the (config, keys, ring) tuple of parse_snapshot.
+        :param kwargs: other HashRing parameters (like weight_fn).
+        """
+        config, keys, ring = snapshot
+        kwargs.update(hash_fn=config["hash_fn"], vnodes=config["vnodes"], compact=True)
+        if "replicas" in config:
+            kwargs["replicas"] = config["replicas"]
+        hashring = cls(**kwargs)
+        runtime = hashring.runtime
+        if isinstance(runtime, LazyRing):
+            runtime = runtime._builder
+        restore_runtime(runtime, config, keys, ring)
+        return hashring
+
+    @classmethod
+    def from_shared_memory(cls, name, **kwargs):
+        """Returns a new HashRing attached to the continuum published in
+        shared memory by the HashRing created with shared_memory=name.
+
+        The ring follows every change published by the coordinator and can
+        not be changed itself, the nodes instances are set to None.
+
+        :param name: the shared memory name of the ring.
+        :param kwargs: other HashRing parameters (like lookup_cache).
+        """
+        hashring = cls(**kwargs)
+        hashring.runtime = SharedRing(name)
+        hashring._bind_runtime()
+        return hashring
 
     def get(self, key):
         """Returns the node object dict matching the hashed key.
 
         :param key: the key to look for.
         """
-        return self._get(key, "dict")
+        return self._get_lookup().dict(key)
 
     def get_instances(self):
         """Returns a list of the instances of all the configured nodes."""
@@ -192,21 +693,29 @@ class HashRing:
 
         :param key: the key to look for.
         """
-        return self._get(key, "nodename")
+        return self._get_lookup().nodename(key)
+
+    def get_node_bounded(self, key):
+        """Returns the name of the node under its load capacity matching
+        the hashed key, without changing its load.
+
+        :param key: the key to look for.
+        """
+        return self._get_bounded(key)
 
     def get_node_hostname(self, key):
         """Returns the hostname of the node matching the hashed key.
 
         :param key: the key to look for.
         """
-        return self._get(key, "hostname")
+        return self._get_lookup().hostname(key)
 
     def get_node_port(self, key):
         """Returns the port of the node matching the hashed key.
 
         :param key: the key to look for.
         """
-        return self._get(key, "port")
+        return self._get_lookup().port(key)
 
     def get_node_pos(self, key):
         """Returns the index position of the node matching the hashed key.
@@ -220,22 +729,107 @@ class HashRing:
 
         :param key: the key to look for.
         """
-        return self._get(key, "weight")
+        return self._get_lookup().weight(key)
 
     def get_nodes(self):
         """Returns a list of the names of all the configured nodes."""
         return self.runtime._nodes.keys()
 
+    def get_nodes_many(self, keys, what="nodename"):
+        """Returns a list of the nodes information matching the hashed keys.
+
+        The keys are hashed and resolved against the continuum in one batch
+        and the results are returned in the same order as the given keys.
+
+        :param keys: an iterable of keys to look for.
+        :param what: the information to look for, allowed values are the
+                     same as the _get method (default nodename).
+        """
+        keys = list(keys)
+        continuum = self.runtime._continuum
+        if not continuum.ring:
+            return [None] * len(keys)
+
+        positions = self._get_pos_many(keys, continuum)
+        if self._down:
+            down = self._down
+            _keys, _ring = continuum.keys, continuum.ring
+            positions = [
+                self._get_live_pos(continuum, pos) if _ring[_keys[pos]] in down else pos
+                for pos in positions
+            ]
+            if None in positions:
+                # all the nodes are down
+                return [None] * len(keys)
+        if what == "pos":
+            return positions
+
+        _keys = continuum.keys
+        _ring = continuum.ring
+        _nodes = continuum.nodes
+        nodenames = [_ring[_keys[pos]] for pos in positions]
+        if self._metrics is not None:
+            self._metrics.count(nodenames)
+        if what in ["hostname", "instance", "port", "weight"]:
+            return [_nodes[nodename][what] for nodename in nodenames]
+        elif what == "dict":
+            return [_nodes[nodename] for nodename in nodenames]
+        elif what == "nodename":
+            return nodenames
+        elif what == "tuple":
+            return [(_keys[pos], nodename) for pos, nodename in zip(positions, nodenames)]
+        raise ValueError(f"unsupported lookup '{what}'")
+
+    def get_ownership(self):
+        """Returns the exact Ownership of the keyspace of the ring.
+
+        The shares of the continuum based rings are computed from the arc
+        lengths between their points over the 32, 64 or 128 bits keyspace
+        of their hash function, the shares of the jump and Maglev rings
+        from their number of buckets or lookup table entries. The stddev
+        and imbalance metrics compare the shares to the weighted ideal
+        shares of the nodes.
+        """
+        continuum = self.runtime._continuum
+        if hasattr(self.runtime, "_get_pos"):
+            return get_ownership(continuum)
+        keyspace = get_keyspace(get_hash_name(self.runtime), continuum)
+        return get_ownership(continuum, keyspace, get_keyspace_start(keyspace, continuum))
+
     def get_points(self):
         """Returns a ketama compatible list of (position, nodename) tuples."""
-        return [(k, self.runtime._ring[k]) for k in self.runtime._keys]
+        continuum = self.runtime._continuum
+        return [(k, continuum.ring[k]) for k in continuum.keys]
 
     def get_server(self, key):
         """Returns a ketama compatible (position, nodename) tuple.
 
         :param key: the key to look for.
         """
-        return self._get(key, "tuple")
+        return self._get_lookup().server(key)
+
+    def iter_moved_keys(self, other, keys, chunk_size=1000):
+        """Returns a generator of the (key, old_node, new_node) tuples of
+        the given keys which are mapped to another node by the other ring.
+
+        The keys are looked up by chunks so that any iterable of keys can
+        be streamed with a bounded memory usage.
+
+        :param other: the HashRing or the nodes configuration to compare with.
+        :param keys: an iterable of keys to look for.
+        :param chunk_size: the number of keys looked up at once.
+        """
+        other = self._get_other_ring(other)
+        keys = iter(keys)
+        while True:
+            chunk = list(islice(keys, chunk_size))
+            if not chunk:
+                return
+            for key, old_node, new_node in zip(
+                chunk, self.get_nodes_many(chunk), other.get_nodes_many(chunk)
+            ):
+                if old_node != new_node:
+                    yield key, old_node, new_node
 
     def iterate_nodes(self, key, distinct=True):
         """hash_ring compatibility implementation.
@@ -253,6 +847,108 @@ class HashRing:
             for node in self.range(key, unique=distinct):
                 yield node["nodename"]
 
+    def partition(self, keys):
+        """Returns a dict of the node names to the list of the given keys
+        they own, the keys are looked up in one batch (see get_nodes_many)
+        and keep their order in every list.
+
+        :param keys: an iterable of keys to look for.
+        """
+        keys = list(keys)
+        partition = {}
+        for key, nodename in zip(keys, self.get_nodes_many(keys)):
+            if nodename is not None:
+                partition.setdefault(nodename, []).append(key)
+        return partition
+
+    def plan_moves(self, other):
+        """Returns the MovePlan of the keyspace between this ring and the
+        other one (or a proposed nodes configuration of this ring).
+
+        The plan lists the moved arcs of hashes as (start, end, old_node,
+        new_node) tuples of hashes in [start, end) and the fraction of the
+        keyspace moved per (old_node, new_node) pair. Both rings must be
+        continuum based and use the same hash function.
+
+        :param other: the HashRing or the nodes configuration to compare with.
+        """
+        other = self._get_other_ring(other)
+        hash_name = get_hash_name(self.runtime)
+        if get_hash_name(other.runtime) != hash_name:
+            raise ValueError("both rings should use the same hash function")
+        continuum, other_continuum = self.runtime._continuum, other.runtime._continuum
+        keyspace = get_keyspace(hash_name, continuum, other_continuum)
+        keyspace_start = get_keyspace_start(keyspace, continuum, other_continuum)
+        return plan_moves(continuum, other_continuum, keyspace, keyspace_start)
+
+    def recommend_vnodes(self, imbalance, max_vnodes=4096):
+        """Returns the smallest default number of vnodes per node for which
+        the Ownership imbalance of the current nodes is at most the given
+        one.
+
+        Rings of the current nodes are built with a doubling number of
+        vnodes until the imbalance is reached, then the number of vnodes is
+        bisected. The imbalance does not strictly decrease with the number
+        of vnodes so this is a recommendation, not the global minimum.
+
+        :param imbalance: the target largest share over its ideal share.
+        :param max_vnodes: the largest number of vnodes to try.
+        """
+        # raises for the rings which are not continuum based
+        get_hash_name(self.runtime)
+        if imbalance < 1:
+            raise ValueError("imbalance should be greater than or equal to 1")
+        # the nodes vnodes configuration is replaced by the default one
+        nodes = {
+            nodename: {k: v for k, v in conf.items() if k != "vnodes"}
+            for nodename, conf in self.runtime._nodes.items()
+        }
+
+        def reached(vnodes):
+            ring = self._get_other_ring(nodes, vnodes=vnodes)
+            return ring.get_ownership().imbalance <= imbalance
+
+        low, high = 0, 1
+        while not reached(high):
+            if high >= max_vnodes:
+                raise ValueError(
+                    "imbalance {} can't be reached with up to {} vnodes".format(
+                        imbalance, max_vnodes
+                    )
+                )
+            low, high = high, min(high * 2, max_vnodes)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if reached(middle):
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def mark_down(self, nodename):
+        """Mark the given node as down, lookups then skip it to the next
+        distinct node which is not down without changing the continuum.
+
+        :param nodename: the node name.
+        """
+        if nodename not in self.runtime._nodes:
+            raise KeyError(
+                "node '{}' not found, available nodes: {}".format(
+                    nodename, self.runtime._nodes.keys()
+                )
+            )
+        if nodename not in self._down:
+            self._down = self._down | {nodename}
+
+    def mark_up(self, nodename):
+        """Mark the given node as up again, lookups then get back exactly the
+        node they got before it was marked down.
+
+        :param nodename: the node name.
+        """
+        if nodename in self._down:
+            self._down = self._down - {nodename}
+
     def print_continuum(self):
         """Prints a ketama compatible continuum report."""
         numpoints = len(self.runtime._keys)
@@ -272,40 +968,145 @@ class HashRing:
         :param size: limit the list to at most this number of nodes.
         :param unique: a node may only appear once in the list (default True).
         """
-        all_nodes = set()
-        if unique:
-            size = size or len(self.runtime._nodes)
-        else:
-            all_nodes = []
-
-        pos = self._get_pos(key)
-        for key in self.runtime._keys[pos:]:
-            nodename = self.runtime._ring[key]
-            if unique:
-                if nodename in all_nodes:
-                    continue
-                all_nodes.add(nodename)
-            else:
-                all_nodes.append(nodename)
-            yield self.runtime._nodes[nodename]
-            if len(all_nodes) == size:
-                break
-        else:
-            for i, key in enumerate(self.runtime._keys):
-                if i < pos:
-                    nodename = self.runtime._ring[key]
-                    if unique:
-                        if nodename in all_nodes:
-                            continue
-                        all_nodes.add(nodename)
-                    else:
-                        all_nodes.append(nodename)
-                    yield self.runtime._nodes[nodename]
-                    if len(all_nodes) == size:
-                        break
+        continuum = self.runtime._continuum
+        if not continuum.ring:
+            return
+        _nodes = continuum.nodes
+        for nodename in self._walk(continuum, self._get_pos(key, continuum), size, unique):
+            yield _nodes[nodename]
 
     def regenerate(self):
-        self.runtime._create_ring(self.runtime._nodes.items())
+        self._rebuild(self.runtime._create_ring, self.runtime._nodes.items())
+
+    def release(self, nodename):
+        """Decrements the load of the given node.
+
+        :param nodename: the node name.
+        """
+        if self._loads[nodename] <= 0:
+            raise ValueError("node '{}' has no load to release".format(nodename))
+        self._loads[nodename] -= 1
+        self._loads_total -= 1
+
+    def route_stream(self, keys, chunk_size=10000, workers=None):
+        """Returns a generator of the (key, nodename) tuples of the given
+        keys, in the same order.
+
+        The keys are consumed lazily by chunks looked up in one batch, so
+        that any iterable of keys can be streamed with a bounded memory
+        usage. With more than one worker, the chunks are looked up in
+        parallel by a pool of processes sharing a snapshot of the
+        continuum, see save_snapshot for the supported rings.
+
+        :param keys: an iterable of keys to look for.
+        :param chunk_size: the number of keys looked up at once.
+        :param workers: the number of worker processes (default None, the
+                        keys are looked up by the current process).
+        """
+        return route_stream(self, keys, chunk_size, workers)
+
+    def save_snapshot(self, path):
+        """Write the continuum and configuration of the ring to the given
+        snapshot file, see from_snapshot.
+
+        :param path: the snapshot file path.
+        """
+        save_snapshot(self, path)
+
+    def set_load(self, nodename, load):
+        """Set the current load of the given node, use this to feed the
+        bounded loads lookups with live counts.
+
+        :param nodename: the node name.
+        :param load: the current load of the node.
+        """
+        if nodename not in self.runtime._nodes:
+            raise KeyError(
+                "node '{}' not found, available nodes: {}".format(
+                    nodename, self.runtime._nodes.keys()
+                )
+            )
+        self._loads_total += load - self._loads[nodename]
+        self._loads[nodename] = load
+
+    def update(self, add=None, remove=None, reweight=None):
+        """Apply the given nodes changes with a single rebuild of the
+        continuum/ring and returns the RingUpdate of the applied changes.
+
+        All the changes are validated before the continuum is rebuilt, the
+        nodes configuration is left unchanged when one of them is invalid.
+
+        :param add: the nodes to add or overwrite (see doc for format).
+        :param remove: an iterable of the names of the nodes to remove.
+        :param reweight: a dict of node names to their new weight.
+        """
+        self._require_builder()
+        if isinstance(add, str):
+            add = [add]
+        if add is None:
+            add = {}
+        elif isinstance(add, list):
+            add = {nodename: {} for nodename in add}
+        elif not isinstance(add, dict):
+            raise ValueError(
+                "nodes configuration should be a list or a dict," " got {}".format(type(add))
+            )
+        remove = list(dict.fromkeys(remove or ()))
+        reweight = reweight or {}
+
+        with self._changing:
+            _nodes = self.runtime._nodes
+            before = dict(_nodes)
+            for nodename in remove:
+                if nodename not in before:
+                    raise KeyError(
+                        "node '{}' not found, available nodes: {}".format(nodename, before.keys())
+                    )
+                if nodename in add or nodename in reweight:
+                    raise ValueError("node '{}' can't be both removed and changed".format(nodename))
+            for nodename in reweight:
+                if nodename not in before and nodename not in add:
+                    raise KeyError(
+                        "node '{}' not found, available nodes: {}".format(nodename, before.keys())
+                    )
+
+            changed = []
+            try:
+                for nodename, conf in add.items():
+                    if self._configure_nodes({nodename: conf}):
+                        changed.append(nodename)
+                for nodename, weight in reweight.items():
+                    if self._configure_nodes({nodename: dict(_nodes[nodename], weight=weight)}):
+                        changed.append(nodename)
+                for nodename in remove:
+                    del _nodes[nodename]
+            except Exception:
+                # leave the nodes configuration unchanged
+                _nodes.clear()
+                _nodes.update(before)
+                raise
+
+            changed = list(dict.fromkeys(changed))
+            if changed or remove:
+                self._rebuild(
+                    self.runtime._update_ring,
+                    [(nodename, _nodes[nodename]) for nodename in changed],
+                    remove,
+                )
+            elif add:
+                # the continuum is unchanged but the nodes instance or
+                # port may have changed
+                self.runtime._update_nodes()
+
+        for nodename in remove:
+            self._loads_total -= self._loads.pop(nodename, 0)
+        if self._down.intersection(remove):
+            self._down = self._down.difference(remove)
+        return RingUpdate(
+            [nodename for nodename in changed if nodename not in before],
+            remove,
+            [nodename for nodename in changed if nodename in before],
+        )
 
     @property
     def conf(self):
@@ -313,10 +1114,43 @@ class HashRing:
 
     nodes = conf
 
+    @property
+    def disruption(self):
+        """Returns the fraction of the lookup table which changed owner on
+        the last ring change, None when not supported by the algorithm."""
+        return getattr(self.runtime, "_disruption", None)
+
     @property
     def distribution(self):
         return self.runtime._distribution
 
+    @property
+    def down_nodes(self):
+        """Returns the frozenset of the names of the nodes marked down."""
+        return self._down
+
+    @property
+    def lookup_cache_info(self):
+        """Returns the lookup cache hits, misses, maxsize and currsize
+        statistics or None when the lookup cache is disabled."""
+        if self._lookup_cache is None:
+            return None
+        hits, misses = self._lookup_cache_stats
+        info = self._lookup_cache[1].cache_info()
+        return info._replace(hits=hits + info.hits, misses=misses + info.misses)
+
+    @property
+    def metrics(self):
+        """Returns the RingMetrics of the ring (lookups counter per node,
+        rebuilds, rebuild_duration and last_rebuild) or None when the
+        metrics are disabled."""
+        return self._metrics
+
+    @property
+    def loads(self):
+        """Returns the counter of the current load of the nodes."""
+        return self._loads
+
     @property
     def ring(self):
         return self.runtime._ring
@@ -0,0 +1,137 @@
+from collections import Counter
+
+from uhashring.continuum import ContinuumRuntime
+from uhashring.hashes import get_hash_fn, md5_64
+
+
+def jump_hash(key, num_buckets):
+    """Returns the bucket of the given 64 bits integer key using the jump
+    consistent hash algorithm from Lamping and Veach.
+
+    :param key: the integer key, only its 64 least significant bits are used.
+    :param num_buckets: the number of buckets.
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < num_buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+class JumpRing(ContinuumRuntime):
+    """Implement a jump consistent hashing ring.
+
+    Every node gets as many buckets as its weight, the continuum/ring is the
+    list of the buckets owners and a key is mapped to its bucket with no
+    other memory than this list.
+
+    Buckets are only ever appended or removed at the tail of the list:
+        - adding a node (or increasing its weight) appends its buckets and
+          only moves the keys which go to the new buckets.
+        - removing a node (or decreasing its weight) replaces each of its
+          buckets by the last bucket of the list. When the node owns the
+          last buckets only its keys move, else the keys of the tail
+          buckets are also redistributed among all the buckets.
+    """
+
+    def __init__(self, hash_fn):
+        """Create a new HashRing.
+
+        :param hash_fn: use this callable function to hash keys, can be set
+                        to the name of a registered hash function.
+        """
+        self._nodes = {}
+        self._publish(range(0), [], Counter())
+
+        if isinstance(hash_fn, str):
+            hash_fn = get_hash_fn(hash_fn)
+        if hash_fn and not hasattr(hash_fn, "__call__"):
+            raise TypeError("hash_fn should be a callable function")
+        self._hash_fn = hash_fn or md5_64
+
+    def hashi(self, key):
+        """Returns the hash of the given key by the configured hash_fn."""
+        return self._hash_fn(key)
+
+    def _get_pos(self, key, continuum):
+        """Get the bucket index of the given key.
+
+        :param key: the key to hash and look for.
+        :param continuum: the published continuum to look into.
+        """
+        if not continuum.ring:
+            return 0
+        return jump_hash(self._hash_fn(key), len(continuum.ring))
+
+    def _get_pos_many(self, keys, continuum):
+        """Get the bucket index of every given key.
+
+        :param keys: a list of keys to look for.
+        :param continuum: the published continuum to look into.
+        """
+        return [self._get_pos(key, continuum) for key in keys]
+
+    def _create_ring(self, nodes):
+        """Generate the buckets list from all the configured nodes."""
+        _ring = []
+        for node_name, node_conf in self._nodes.items():
+            _ring.extend([node_name] * node_conf["weight"])
+        self._set_continuum(_ring)
+
+    def _update_ring(self, nodes, removed=()):
+        """Update the buckets of the given (new or changed) nodes.
+
+        :param nodes: an iterable of (node_name, node_conf) tuples.
+        :param removed: the names of the removed nodes, whose buckets are
+                        removed in the same update.
+        """
+        _ring = list(self._ring)
+        for node_name in removed:
+            self._resize_node(_ring, node_name, 0)
+        for node_name, node_conf in nodes:
+            self._resize_node(_ring, node_name, node_conf["weight"])
+        self._set_continuum(_ring)
+
+    def _remove_node(self, node_name):
+        """Remove the given node from the continuum/ring.
+
+        :param node_name: the node name.
+        """
+        try:
+            self._nodes.pop(node_name)
+        except Exception:
+            raise KeyError(
+                "node '{}' not found, available nodes: {}".format(node_name, self._nodes.keys())
+            )
+        else:
+            _ring = list(self._ring)
+            self._resize_node(_ring, node_name, 0)
+            self._set_continuum(_ring)
+
+    def _resize_node(self, _ring, node_name, weight):
+        """Append or remove buckets of the given node so that it owns as
+        many buckets as its weight.
+
+        :param _ring: the buckets list to update.
+        :param node_name: the node name.
+        :param weight: the target number of buckets of the node.
+        """
+        buckets = self._distribution.get(node_name, 0)
+        if weight > buckets:
+            _ring.extend([node_name] * (weight - buckets))
+        elif weight < buckets:
+            positions = [pos for pos, owner in enumerate(_ring) if owner == node_name]
+            # remove the highest buckets first since they may be at the tail
+            for pos in reversed(positions[weight:]):
+                last = _ring.pop()
+                if pos < len(_ring):
+                    _ring[pos] = last
+
+    def _set_continuum(self, _ring):
+        """Publish the buckets list and its distribution.
+
+        :param _ring: the list of the owner node name of every bucket.
+        """
+        self._publish(range(len(_ring)), _ring, Counter(_ring))
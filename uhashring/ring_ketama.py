@@ -1,20 +1,29 @@
-from bisect import insort
+from bisect import bisect, bisect_left
 from collections import Counter
 from hashlib import md5
+from struct import Struct
 
+from uhashring.compact import compact_continuum
+from uhashring.continuum import ContinuumRuntime
 
-class KetamaRing:
+
+class KetamaRing(ContinuumRuntime):
     """Implement a ketama compatible consistent hashing ring."""
 
-    def __init__(self, replicas=4):
-        """Create a new HashRing."""
-        self._distribution = Counter()
-        self._keys = []
+    def __init__(self, replicas=4, compact=False):
+        """Create a new HashRing.
+
+        :param replicas: number of points per vnode.
+        :param compact: store the continuum in compact arrays.
+        """
+        self._compact = compact
+        self._ks = {}
         self._nodes = {}
         self._replicas = replicas
-        self._ring = {}
 
         self._listbytes = lambda x: x
+        # every replica point is a little endian uint32 of the md5 digest
+        self._unpack_points = Struct(f"<{replicas}I").unpack_from
 
     def hashi(self, key, replica=0):
         """Returns a ketama compatible hash from the given key."""
@@ -22,17 +31,36 @@ class KetamaRing:
         rd = replica * 4
         return (dh[3 + rd] << 24) | (dh[2 + rd] << 16) | (dh[1 + rd] << 8) | dh[0 + rd]
 
+    def _get_ks(self, node_conf):
+        """Returns the number of vnodes of the given node, calculated
+        from its weight factor on the ring.
+
+        :param node_conf: the node configuration.
+        """
+        return (node_conf["vnodes"] * len(self._nodes) * node_conf["weight"]) // self._weight_sum
+
     def _hashi_weight_generator(self, node_name, node_conf):
         """Calculate the weight factor of the given node and
         yield its hash key for every configured replica.
 
         :param node_name: the node name.
         """
-        ks = (node_conf["vnodes"] * len(self._nodes) * node_conf["weight"]) // self._weight_sum
-        for w in range(0, ks):
-            w_node_name = f"{node_name}-{w}"
-            for i in range(0, self._replicas):
-                yield self.hashi(w_node_name, replica=i)
+        yield from self._hashi_vnodes_generator(node_name, 0, self._get_ks(node_conf))
+
+    def _hashi_vnodes_generator(self, node_name, start, stop):
+        """Yield the hash key of every configured replica of the given
+        node's vnodes range.
+
+        :param node_name: the node name.
+        :param start: the first vnode index.
+        :param stop: the vnode index to stop at (excluded).
+        """
+        unpack_points = self._unpack_points
+        for w in range(start, stop):
+            # the digest is computed once per vnode and every replica point
+            # is extracted from it, this is the same as calling
+            # hashi(f"{node_name}-{w}", replica=i) for every replica
+            yield from unpack_points(md5(f"{node_name}-{w}".encode("utf-8")).digest())
 
     @staticmethod
     def _listbytes(data):
@@ -42,24 +70,96 @@ class KetamaRing:
         """
         return map(ord, data)
 
-    def _create_ring(self, nodes):
-        """Generate a ketama compatible continuum/ring."""
+    def _set_weight_sum(self):
+        """Calculate the total weight of the configured nodes."""
         _weight_sum = 0
         for node_conf in self._nodes.values():
             _weight_sum += node_conf["weight"]
         self._weight_sum = _weight_sum
 
+    def _create_ring(self, nodes):
+        """Generate a ketama compatible continuum/ring."""
+        self._set_weight_sum()
+
         _distribution = Counter()
         _keys = []
+        _ks = {}
         _ring = {}
         for node_name, node_conf in self._nodes.items():
-            for h in self._hashi_weight_generator(node_name, node_conf):
+            _ks[node_name] = self._get_ks(node_conf)
+            points = list(self._hashi_vnodes_generator(node_name, 0, _ks[node_name]))
+            for h in points:
                 _ring[h] = node_name
-                insort(_keys, h)
-                _distribution[node_name] += 1
-        self._distribution = _distribution
-        self._keys = _keys
-        self._ring = _ring
+            _keys.extend(points)
+            if points:
+                _distribution[node_name] = len(points)
+        # sort all the points at once, colliding points are kept duplicated
+        # in the continuum as libketama does
+        _keys.sort()
+        if self._compact:
+            _keys, _ring = compact_continuum(_keys, _ring)
+        self._ks = _ks
+        self._publish(_keys, _ring, _distribution)
+
+    def _update_ring(self, nodes=(), removed=()):
+        """Update the ketama compatible continuum/ring to the current nodes
+        configuration without rehashing the unchanged points.
+
+        The number of vnodes of every node depends on the total weight of
+        the ring so we compute the vnodes delta of every node and only hash,
+        insert and delete the points that changed. The result is the same
+        as a full _create_ring.
+
+        When a changed point collides with another one, its owner depends on
+        the nodes order so we fall back to a full _create_ring.
+
+        :param nodes: unused, the delta is computed on all the nodes but the
+                      runtimes interface passes the added or changed nodes.
+        :param removed: unused, the names of the removed nodes passed by the
+                        runtimes interface.
+        """
+        self._set_weight_sum()
+        _ks = {node_name: self._get_ks(node_conf) for node_name, node_conf in self._nodes.items()}
+
+        stale_points = []
+        for node_name, old_ks in self._ks.items():
+            new_ks = _ks.get(node_name, 0)
+            if new_ks < old_ks:
+                stale_points.extend(self._hashi_vnodes_generator(node_name, new_ks, old_ks))
+
+        added = {}
+        for node_name, new_ks in _ks.items():
+            old_ks = self._ks.get(node_name, 0)
+            for h in self._hashi_vnodes_generator(node_name, old_ks, new_ks):
+                if h in added or h in self._ring:
+                    return self._create_ring(self._nodes.items())
+                added[h] = node_name
+
+        _keys = self._keys
+        for h in stale_points:
+            if bisect(_keys, h) - bisect_left(_keys, h) != 1:
+                return self._create_ring(self._nodes.items())
+
+        _ring = self._ring.copy()
+        if stale_points:
+            stale_points = set(stale_points)
+            for h in stale_points:
+                del _ring[h]
+            _keys = [h for h in _keys if h not in stale_points]
+        else:
+            _keys = list(_keys)
+        _ring.update(added)
+        _keys.extend(added)
+        _keys.sort()
+        if self._compact:
+            _keys, _ring = compact_continuum(_keys, _ring)
+
+        self._ks = _ks
+        self._publish(
+            _keys,
+            _ring,
+            Counter({node_name: ks * self._replicas for node_name, ks in _ks.items() if ks}),
+        )
 
     def _remove_node(self, node_name):
         """Remove the given node from the continuum/ring.
@@ -73,4 +173,4 @@ class KetamaRing:
                 "node '{}' not found, available nodes: {}".format(node_name, self._nodes.keys())
             )
         else:
-            self._create_ring(self._nodes)
+            self._update_ring()
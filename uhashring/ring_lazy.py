@@ -0,0 +1,156 @@
+from threading import RLock
+
+
+class LazyRing:
+    """Defer the continuum builds of a runtime to the first lookup.
+
+    Nodes changes only record the changed and removed nodes and mark the
+    ring dirty. The first access to the continuum builds it, or updates it
+    once with all the recorded changes, so that consecutive changes are
+    coalesced into a single build.
+
+    Builds are run by the lookup threads while holding the lock, the nodes
+    changes must hold it as well (see HashRing) so that a build never sees
+    a half applied change. Lookups of a clean ring take no lock.
+
+    The other attributes (like hashi) are the ones of the wrapped runtime.
+    """
+
+    def __init__(self, runtime, rebuild=None):
+        """Create a new lazy ring.
+
+        :param runtime: the runtime building the continuum.
+        :param rebuild: called with the runtime operation and its arguments
+                        to build the continuum, see HashRing._rebuild.
+        """
+        self._builder = runtime
+        self._building = False
+        self._changed = {}
+        self._create = False
+        self._dirty = False
+        self._lock = RLock()
+        self._rebuild = rebuild
+        self._removed = {}
+
+    def __getattr__(self, name):
+        if name == "_builder":
+            raise AttributeError(name)
+        return getattr(self._builder, name)
+
+    @property
+    def _continuum(self):
+        """Returns the continuum, built first when the ring is dirty."""
+        if self._dirty:
+            with self._lock:
+                # the continuum may be read while it is being built
+                if self._dirty and not self._building:
+                    self._build()
+        return self._builder._continuum
+
+    @property
+    def _distribution(self):
+        return self._continuum.distribution
+
+    @property
+    def _keys(self):
+        return self._continuum.keys
+
+    @property
+    def _nodes(self):
+        return self._builder._nodes
+
+    @property
+    def _ring(self):
+        return self._continuum.ring
+
+    def _build(self):
+        """Build the continuum with the recorded changes, only the changes
+        taken by this build are cleared."""
+        builder = self._builder
+        create, changed, removed = self._create, self._changed, self._removed
+        self._create, self._changed, self._removed = False, {}, {}
+        if create:
+            operation, args = builder._create_ring, (list(builder._nodes.items()),)
+        else:
+            operation, args = builder._update_ring, (
+                [
+                    (node_name, builder._nodes[node_name])
+                    for node_name in changed
+                    if node_name in builder._nodes
+                ],
+                list(removed),
+            )
+
+        self._building = True
+        try:
+            if self._rebuild is None:
+                operation(*args)
+            else:
+                self._rebuild(operation, *args)
+        except Exception:
+            # record the changes again for the next build, unless they were
+            # recorded again meanwhile
+            self._create = self._create or create
+            for node_name in changed:
+                if node_name not in self._removed:
+                    self._changed.setdefault(node_name, None)
+            for node_name in removed:
+                if node_name not in self._changed:
+                    self._removed.setdefault(node_name, None)
+            raise
+        finally:
+            self._building = False
+        # the lookups waiting for this build then use its continuum
+        self._dirty = bool(self._create or self._changed or self._removed)
+
+    def _get_builder(self):
+        """Returns the wrapped runtime once its continuum is built."""
+        self._continuum
+        return self._builder
+
+    def _create_ring(self, nodes):
+        """Mark the continuum/ring to be generated from all the nodes."""
+        with self._lock:
+            self._changed.clear()
+            self._create = True
+            self._dirty = True
+            self._removed.clear()
+
+    def _update_ring(self, nodes, removed=()):
+        """Record the given (new or changed) and removed nodes.
+
+        :param nodes: an iterable of (node_name, node_conf) tuples.
+        :param removed: the names of the removed nodes.
+        """
+        with self._lock:
+            for node_name, _ in nodes:
+                self._removed.pop(node_name, None)
+                self._changed[node_name] = None
+            for node_name in removed:
+                self._changed.pop(node_name, None)
+                self._removed[node_name] = None
+            self._dirty = True
+
+    def _remove_node(self, node_name):
+        """Remove the given node and record its removal.
+
+        :param node_name: the node name.
+        """
+        with self._lock:
+            try:
+                self._builder._nodes.pop(node_name)
+            except Exception:
+                raise KeyError(
+                    "node '{}' not found, available nodes: {}".format(
+                        node_name, self._builder._nodes.keys()
+                    )
+                )
+            else:
+                self._update_ring((), [node_name])
+
+    def _update_nodes(self):
+        """Publish the continuum again with the current nodes configuration,
+        the next build does it when the ring is dirty."""
+        with self._lock:
+            if not self._dirty:
+                self._builder._update_nodes()
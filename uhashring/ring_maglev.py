@@ -0,0 +1,148 @@
+from collections import Counter
+from hashlib import md5
+
+from uhashring.continuum import ContinuumRuntime
+from uhashring.hashes import get_hash_fn, md5_64
+
+
+def _is_prime(n):
+    if n < 2:
+        return False
+    i = 2
+    while i * i <= n:
+        if n % i == 0:
+            return False
+        i += 1
+    return True
+
+
+class MaglevRing(ContinuumRuntime):
+    """Implement a Maglev consistent hashing lookup table.
+
+    Every node fills the entries of a fixed size lookup table following its
+    own permutation of the table, taking as many turns as its weight, and a
+    key is mapped to a node with a single modulo index into the table.
+
+    The table is populated again on every node change, the fraction of its
+    entries which changed owner is reported as the disruption.
+    """
+
+    def __init__(self, hash_fn, table_size=65537):
+        """Create a new HashRing.
+
+        :param hash_fn: use this callable function to hash keys, can be set
+                        to the name of a registered hash function.
+        :param table_size: the size of the lookup table, it must be a prime
+                           number much larger than the number of nodes.
+        """
+        if not _is_prime(table_size):
+            raise ValueError("table_size should be a prime number, got {}".format(table_size))
+        self._disruption = 0.0
+        self._nodes = {}
+        self._permutations = {}
+        self._publish(range(0), [], Counter())
+        self._table_size = table_size
+
+        if isinstance(hash_fn, str):
+            hash_fn = get_hash_fn(hash_fn)
+        if hash_fn and not hasattr(hash_fn, "__call__"):
+            raise TypeError("hash_fn should be a callable function")
+        self._hash_fn = hash_fn or md5_64
+
+    def hashi(self, key):
+        """Returns the hash of the given key by the configured hash_fn."""
+        return self._hash_fn(key)
+
+    def _get_pos(self, key, continuum):
+        """Get the lookup table index of the given key.
+
+        :param key: the key to hash and look for.
+        :param continuum: the published continuum to look into.
+        """
+        if not continuum.ring:
+            return 0
+        return self._hash_fn(key) % self._table_size
+
+    def _get_pos_many(self, keys, continuum):
+        """Get the lookup table index of every given key.
+
+        :param keys: a list of keys to look for.
+        :param continuum: the published continuum to look into.
+        """
+        if not continuum.ring:
+            return [0] * len(keys)
+        hash_fn = self._hash_fn
+        table_size = self._table_size
+        return [hash_fn(key) % table_size for key in keys]
+
+    def _get_permutation(self, node_name):
+        """Returns the (offset, skip) permutation of the lookup table
+        of the given node.
+
+        :param node_name: the node name.
+        """
+        try:
+            return self._permutations[node_name]
+        except KeyError:
+            digest = md5(str(node_name).encode("utf-8")).digest()
+            offset = int.from_bytes(digest[:8], "big") % self._table_size
+            skip = int.from_bytes(digest[8:], "big") % (self._table_size - 1) + 1
+            self._permutations[node_name] = (offset, skip)
+            return offset, skip
+
+    def _create_ring(self, nodes):
+        """Populate the lookup table from all the configured nodes."""
+        table_size = self._table_size
+        candidates = []
+        for node_name, node_conf in self._nodes.items():
+            if node_conf["weight"] > 0:
+                offset, skip = self._get_permutation(node_name)
+                candidates.append([node_name, node_conf["weight"], offset, skip])
+
+        _ring = [None] * table_size if candidates else []
+        filled = 0
+        while filled < len(_ring):
+            for candidate in candidates:
+                node_name, weight, pos, skip = candidate
+                for _ in range(weight):
+                    while _ring[pos] is not None:
+                        pos = (pos + skip) % table_size
+                    _ring[pos] = node_name
+                    filled += 1
+                    if filled == table_size:
+                        break
+                candidate[2] = pos
+                if filled == table_size:
+                    break
+
+        if self._ring and _ring:
+            changed = sum(1 for old, new in zip(self._ring, _ring) if old != new)
+            self._disruption = changed / table_size
+        else:
+            self._disruption = 1.0 if self._ring or _ring else 0.0
+        self._publish(range(len(_ring)), _ring, Counter(_ring))
+
+    def _update_ring(self, nodes, removed=()):
+        """Populate the lookup table again after a node change.
+
+        :param nodes: an iterable of (node_name, node_conf) tuples.
+        :param removed: the names of the removed nodes.
+        """
+        for node_name in removed:
+            self._permutations.pop(node_name, None)
+        self._create_ring(self._nodes.items())
+
+    def _remove_node(self, node_name):
+        """Remove the given node from the lookup table.
+
+        :param node_name: the node name.
+        """
+        try:
+            self._nodes.pop(node_name)
+        except Exception:
+            raise KeyError(
+                "node '{}' not found, available nodes: {}".format(node_name, self._nodes.keys())
+            )
+        else:
+            self._permutations.pop(node_name, None)
+            self._create_ring(self._nodes.items())
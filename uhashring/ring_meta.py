@@ -1,23 +1,28 @@
 from collections import Counter
-from hashlib import md5
 
+from uhashring.compact import compact_continuum
+from uhashring.continuum import ContinuumRuntime
+from uhashring.hashes import get_hash_fn, md5_128
 
-class MetaRing:
+
+class MetaRing(ContinuumRuntime):
     """Implement a tunable consistent hashing ring."""
 
-    def __init__(self, hash_fn):
+    def __init__(self, hash_fn, compact=False):
         """Create a new HashRing.
 
-        :param hash_fn: use this callable function to hash keys.
+        :param hash_fn: use this callable function to hash keys, can be set
+                        to the name of a registered hash function.
+        :param compact: store the continuum in compact arrays.
         """
-        self._distribution = Counter()
-        self._keys = []
+        self._compact = compact
         self._nodes = {}
-        self._ring = {}
 
+        if isinstance(hash_fn, str):
+            hash_fn = get_hash_fn(hash_fn)
         if hash_fn and not hasattr(hash_fn, "__call__"):
             raise TypeError("hash_fn should be a callable function")
-        self._hash_fn = hash_fn or (lambda key: int(md5(str(key).encode("utf-8")).hexdigest(), 16))
+        self._hash_fn = hash_fn or md5_128
 
     def hashi(self, key):
         """Returns an integer derived from the md5 hash of the given key."""
@@ -25,11 +30,40 @@ class MetaRing:
 
     def _create_ring(self, nodes):
         """Generate a ketama compatible continuum/ring."""
+        _distribution = Counter()
+        _ring = {}
         for node_name, node_conf in nodes:
             for w in range(0, node_conf["vnodes"] * node_conf["weight"]):
-                self._distribution[node_name] += 1
-                self._ring[self.hashi(f"{node_name}-{w}")] = node_name
-        self._keys = sorted(self._ring.keys())
+                _distribution[node_name] += 1
+                _ring[self.hashi(f"{node_name}-{w}")] = node_name
+        self._set_continuum(_ring, _distribution)
+
+    def _update_ring(self, nodes, removed=()):
+        """Update the points of the given (new or changed) nodes.
+
+        The points of a node are numbered from 0 so only the points above
+        its new number of points are removed or only the missing ones are
+        added.
+
+        :param nodes: an iterable of (node_name, node_conf) tuples.
+        :param removed: the names of the removed nodes, whose points are
+                        removed in the same update.
+        """
+        _distribution = self._distribution.copy()
+        _ring = self._ring.copy()
+        for node_name in removed:
+            self._remove_points(_ring, node_name, 0, _distribution.pop(node_name, 0))
+        for node_name, node_conf in nodes:
+            old_points = _distribution[node_name]
+            new_points = node_conf["vnodes"] * node_conf["weight"]
+            self._remove_points(_ring, node_name, new_points, old_points)
+            for w in range(old_points, new_points):
+                _ring[self.hashi(f"{node_name}-{w}")] = node_name
+            if new_points:
+                _distribution[node_name] = new_points
+            else:
+                _distribution.pop(node_name, None)
+        self._set_continuum(_ring, _distribution)
 
     def _remove_node(self, node_name):
         """Remove the given node from the continuum/ring.
@@ -37,13 +71,38 @@ class MetaRing:
         :param node_name: the node name.
         """
         try:
-            node_conf = self._nodes.pop(node_name)
+            self._nodes.pop(node_name)
         except Exception:
             raise KeyError(
                 "node '{}' not found, available nodes: {}".format(node_name, self._nodes.keys())
             )
         else:
-            self._distribution.pop(node_name)
-            for w in range(0, node_conf["vnodes"] * node_conf["weight"]):
-                del self._ring[self.hashi(f"{node_name}-{w}")]
-            self._keys = sorted(self._ring.keys())
+            _distribution = self._distribution.copy()
+            _ring = self._ring.copy()
+            self._remove_points(_ring, node_name, 0, _distribution.pop(node_name, 0))
+            self._set_continuum(_ring, _distribution)
+
+    def _remove_points(self, _ring, node_name, start, stop):
+        """Remove the given range of points of the node from the ring.
+
+        :param _ring: the point to node name mapping to update.
+        :param node_name: the node name.
+        :param start: the first point index.
+        :param stop: the point index to stop at (excluded).
+        """
+        for w in range(start, stop):
+            h = self.hashi(f"{node_name}-{w}")
+            # the point may have been taken over by a colliding node
+            if _ring.get(h) == node_name:
+                del _ring[h]
+
+    def _set_continuum(self, _ring, _distribution):
+        """Publish the continuum built from the given ring.
+
+        :param _ring: the point to node name mapping of the continuum.
+        :param _distribution: the counter of the points of every node.
+        """
+        _keys = sorted(_ring.keys())
+        if self._compact:
+            _keys, _ring = compact_continuum(_keys, _ring)
+        self._publish(_keys, _ring, _distribution)
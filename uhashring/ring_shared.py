@@ -0,0 +1,236 @@
+from collections import Counter
+from functools import lru_cache
+from struct import Struct
+from types import MappingProxyType
+
+from uhashring.continuum import Continuum
+from uhashring.hashes import get_hash_fn, get_hash_fn_name
+from uhashring.ring_ketama import KetamaRing
+from uhashring.snapshot import dump_snapshot, parse_snapshot
+
+_generation = Struct("Q")
+
+
+@lru_cache(maxsize=None)
+def _track_supported():
+    """Returns whether attached segments can be left untracked, python < 3.13
+    registers every attached segment to the resource tracker which unlinks
+    it when the attaching process exits."""
+    # imported on first use to keep the import of uhashring fast
+    import inspect
+    from multiprocessing.shared_memory import SharedMemory
+
+    return "track" in inspect.signature(SharedMemory).parameters
+
+
+def _attach(name):
+    """Attach to the given shared memory segment without tracking it."""
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+
+    if _track_supported():
+        return SharedMemory(name=name, track=False)
+    shm = SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _close(shm):
+    """Close the given shared memory segment of this process."""
+    try:
+        shm.close()
+    except BufferError:
+        # the points and owners views of the segment are still referenced
+        # by lookups, its memory is unmapped when the last one is released
+        shm._mmap = None
+        shm.close()
+
+
+def _unlink(shm):
+    """Unlink the given shared memory segment created by this process."""
+    from multiprocessing import resource_tracker
+
+    if not _track_supported():
+        # a reader of the same process family may have unregistered it
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+class SharedRing:
+    """Implement a consistent hashing ring shared between processes.
+
+    The coordinator process builds the continuum with a MetaRing or a
+    KetamaRing and publishes every version of it as a snapshot in a new
+    shared memory segment, then flips the generation number stored in the
+    control segment named after the ring.
+
+    Reader processes perform their lookups against the points and owners of
+    the published segment, they check the generation number before every
+    lookup and attach to the new segment when it changed, no lock is taken.
+    """
+
+    def __init__(self, name, runtime=None):
+        """Create or attach to a shared HashRing.
+
+        :param name: the shared memory name of the ring.
+        :param runtime: the MetaRing or KetamaRing building the continuum on
+                        the coordinator process, None to attach as a reader.
+        """
+        self._builder = runtime
+        self._generation = 0
+        self._name = name
+        self._segment = None
+
+        self._hash_fn = None
+        self._hash_name = None
+        self._published = Continuum([], {}, {}, Counter())
+
+        if runtime is None:
+            self._control = _attach(name)
+            self._refresh()
+        else:
+            # snapshots can only be attached by the readers with a registered
+            # hash function, check it before creating any segment
+            if not isinstance(runtime, KetamaRing) and get_hash_fn_name(runtime._hash_fn) is None:
+                raise ValueError(
+                    "shared_memory rings require a hash function registered with register_hash_fn"
+                )
+            from multiprocessing.shared_memory import SharedMemory
+
+            self._control = SharedMemory(name=name, create=True, size=_generation.size)
+            _generation.pack_into(self._control.buf, 0, 0)
+            self._hash_fn = runtime.hashi
+
+    def hashi(self, key):
+        """Returns the hash of the given key."""
+        return self._hash_fn(key)
+
+    @property
+    def _continuum(self):
+        """Returns the last published continuum, readers check its
+        generation number and attach to the new one when it changed."""
+        if self._builder is not None:
+            return self._builder._continuum
+        self._refresh()
+        return self._published
+
+    @property
+    def _distribution(self):
+        return self._continuum.distribution
+
+    @property
+    def _keys(self):
+        return self._continuum.keys
+
+    @property
+    def _nodes(self):
+        if self._builder is not None:
+            return self._builder._nodes
+        # the published nodes are read only for readers
+        return MappingProxyType(self._continuum.nodes)
+
+    @property
+    def _ring(self):
+        return self._continuum.ring
+
+    def _refresh(self):
+        """Attach to the last published continuum when its generation
+        changed."""
+        while True:
+            generation = _generation.unpack_from(self._control.buf)[0]
+            if generation == self._generation:
+                return
+            try:
+                segment = _attach(f"{self._name}_{generation}")
+            except FileNotFoundError:
+                # a newer generation got published meanwhile
+                continue
+            break
+
+        config, keys, ring = parse_snapshot(segment.buf)
+        self._hash_name = config["hash_fn"]
+        if config["hash_fn"] == "ketama":
+            self._hash_fn = KetamaRing(replicas=config["replicas"]).hashi
+        else:
+            self._hash_fn = get_hash_fn(config["hash_fn"])
+        self._published = Continuum(
+            keys,
+            ring,
+            dict((nodename, conf) for nodename, conf in config["nodes"]),
+            Counter(dict(config["distribution"])),
+        )
+        self._generation = generation
+
+        previous = self._segment
+        self._segment = segment
+        if previous is not None:
+            _close(previous)
+
+    def _publish(self):
+        """Publish the continuum of the coordinator in a new shared memory
+        segment and flip the generation number."""
+        from multiprocessing.shared_memory import SharedMemory
+
+        snapshot = dump_snapshot(self._builder)
+        generation = self._generation + 1
+        segment = SharedMemory(
+            name=f"{self._name}_{generation}", create=True, size=max(len(snapshot), 1)
+        )
+        segment.buf[: len(snapshot)] = snapshot
+        _generation.pack_into(self._control.buf, 0, generation)
+        self._generation = generation
+
+        previous = self._segment
+        self._segment = segment
+        if previous is not None:
+            _close(previous)
+            _unlink(previous)
+
+    def _create_ring(self, nodes):
+        """Generate the continuum/ring and publish it."""
+        self._require_builder()
+        self._builder._create_ring(nodes)
+        self._publish()
+
+    def _update_ring(self, nodes, removed=()):
+        """Update the continuum/ring and publish it."""
+        self._require_builder()
+        self._builder._update_ring(nodes, removed)
+        self._publish()
+
+    def _remove_node(self, node_name):
+        """Remove the given node from the continuum/ring and publish it.
+
+        :param node_name: the node name.
+        """
+        self._require_builder()
+        self._builder._remove_node(node_name)
+        self._publish()
+
+    def _update_nodes(self):
+        """Publish the continuum again with the current nodes configuration."""
+        self._require_builder()
+        self._builder._update_nodes()
+        self._publish()
+
+    def _require_builder(self):
+        if self._builder is None:
+            raise TypeError("shared ring readers can not change the continuum")
+
+    def close(self):
+        """Close the shared memory segments of this process."""
+        if self._builder is None:
+            # release the points and owners views of the segment
+            self._published = Continuum([], {}, {}, Counter())
+        for shm in (self._segment, self._control):
+            if shm is not None:
+                _close(shm)
+
+    def unlink(self):
+        """Close and remove the shared memory segments of the ring, this
+        must be called by the coordinator process when done."""
+        self._require_builder()
+        self.close()
+        for shm in (self._segment, self._control):
+            if shm is not None:
+                _unlink(shm)
@@ -0,0 +1,71 @@
+from collections import deque
+from itertools import islice
+
+from uhashring.snapshot import dump_ring, parse_snapshot
+
+# the ring of a route_stream worker process
+_worker_ring = None
+
+
+def _init_worker(snapshot, down):
+    """Restore the ring of a worker process from the given snapshot.
+
+    :param snapshot: the snapshot bytes of the ring.
+    :param down: the names of the nodes marked down.
+    """
+    global _worker_ring
+    # imported here since the ring module imports this one
+    from uhashring.ring import HashRing
+
+    _worker_ring = HashRing._from_snapshot(parse_snapshot(memoryview(snapshot)))
+    for nodename in down:
+        _worker_ring.mark_down(nodename)
+
+
+def _route_chunk(keys):
+    """Returns the node names of the given keys in a worker process.
+
+    :param keys: a list of keys to look for.
+    """
+    return _worker_ring.get_nodes_many(keys)
+
+
+def route_stream(ring, keys, chunk_size=10000, workers=None):
+    """Yield the (key, nodename) tuples of the given keys, see
+    HashRing.route_stream.
+
+    At most two chunks per worker are pending so that the memory usage is
+    bounded whatever the number of keys, and the chunks are yielded in the
+    order they were read.
+
+    :param ring: the HashRing to look into.
+    :param keys: an iterable of keys to look for.
+    :param chunk_size: the number of keys looked up at once.
+    :param workers: the number of worker processes, None to look up the
+                    keys in the current process.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size should be greater than or equal to 1")
+    keys = iter(keys)
+    chunks = iter(lambda: list(islice(keys, chunk_size)), [])
+
+    if not workers or workers < 2:
+        for chunk in chunks:
+            yield from zip(chunk, ring.get_nodes_many(chunk))
+        return
+
+    # imported here to keep the import of uhashring fast
+    from concurrent.futures import ProcessPoolExecutor
+
+    snapshot = dump_ring(ring)
+    down = tuple(ring.down_nodes)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(snapshot, down)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_route_chunk, chunk)))
+            if len(pending) > 2 * workers:
+                chunk, future = pending.popleft()
+                yield from zip(chunk, future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            yield from zip(chunk, future.result())
@@ -0,0 +1,188 @@
+import json
+import mmap
+import sys
+from collections import Counter
+from struct import Struct
+
+from uhashring.compact import CompactRing, compact_continuum
+from uhashring.hashes import get_hash_fn_name
+from uhashring.ring_ketama import KetamaRing
+from uhashring.ring_lazy import LazyRing
+from uhashring.ring_meta import MetaRing
+
+SNAPSHOT_MAGIC = b"UHASHRNG"
+SNAPSHOT_VERSION = 1
+
+# magic, version, big endian flag, point size, owner size, signed points flag,
+# config size, points
+_header = Struct("<8sHBBBBxxIQ4x")
+_owner_formats = {1: "B", 2: "H", 4: "I", 8: "Q"}
+_point_formats = {4: "I", 8: "Q"}
+
+
+def _padding(size):
+    return -size % 8
+
+
+def dump_snapshot(runtime, vnodes=None):
+    """Returns the versioned binary snapshot of the continuum and
+    configuration of the given runtime.
+
+    :param runtime: the MetaRing or KetamaRing to dump.
+    :param vnodes: the default number of vnodes per node of the ring.
+    """
+    if isinstance(runtime, KetamaRing):
+        hash_fn = "ketama"
+    elif isinstance(runtime, MetaRing):
+        hash_fn = get_hash_fn_name(runtime._hash_fn)
+        if hash_fn is None:
+            raise ValueError("snapshots require a hash function registered with register_hash_fn")
+    else:
+        raise ValueError("snapshots are only supported by continuum based rings")
+
+    continuum = runtime._continuum
+    keys, compact_ring = compact_continuum(list(continuum.keys), continuum.ring.copy())
+    owners = compact_ring._owners
+    if keys and not isinstance(keys[0], int):
+        raise ValueError("snapshots require integer points")
+    signed = len(keys) > 0 and keys[0] < 0
+    if len(keys) == 0:
+        point_size = 8
+        points = b""
+    elif isinstance(keys, list):
+        # points wider than 64 bits like the default md5 ones or signed
+        # points like the mmh3.hash ones
+        point_size = 16
+        points = b"".join(k.to_bytes(16, sys.byteorder, signed=signed) for k in keys)
+    else:
+        point_size = keys.itemsize
+        points = keys.tobytes()
+
+    config = {
+        "distribution": list(continuum.distribution.items()),
+        "hash_fn": hash_fn,
+        "names": compact_ring._names,
+        "nodes": [
+            [nodename, dict(conf, instance=None)] for nodename, conf in continuum.nodes.items()
+        ],
+        "size": len(compact_ring),
+        "vnodes": vnodes,
+    }
+    if hash_fn == "ketama":
+        config["ks"] = list(runtime._ks.items())
+        config["replicas"] = runtime._replicas
+    config = json.dumps(config).encode("utf-8")
+
+    snapshot = [
+        _header.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            sys.byteorder == "big",
+            point_size,
+            owners.itemsize,
+            signed,
+            len(config),
+            len(keys),
+        )
+    ]
+    for data in (config, points, owners.tobytes()):
+        snapshot.append(data)
+        snapshot.append(b"\0" * _padding(len(data)))
+    return b"".join(snapshot)
+
+
+def dump_ring(ring):
+    """Returns the versioned binary snapshot of the continuum and
+    configuration of the given ring.
+
+    :param ring: the HashRing to dump.
+    """
+    runtime = ring.runtime
+    if isinstance(runtime, LazyRing):
+        runtime = runtime._get_builder()
+    return dump_snapshot(runtime, ring._default_vnodes)
+
+
+def save_snapshot(ring, path):
+    """Write the continuum and configuration of the given ring to a
+    versioned binary snapshot file.
+
+    :param ring: the HashRing to save.
+    :param path: the snapshot file path.
+    """
+    with open(path, "wb") as f:
+        f.write(dump_ring(ring))
+
+
+def load_snapshot(path):
+    """Memory map the given snapshot file read only.
+
+    Returns the snapshot configuration dict and the (keys, ring) continuum,
+    see parse_snapshot.
+
+    :param path: the snapshot file path.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return parse_snapshot(memoryview(mm))
+
+
+def parse_snapshot(buf):
+    """Returns the snapshot configuration dict and the (keys, ring)
+    continuum of the given snapshot buffer.
+
+    64 bits points and owners are memoryviews of the given buffer so that
+    processes loading the same snapshot share its memory pages.
+
+    :param buf: a memoryview of the snapshot.
+    """
+    if len(buf) < _header.size:
+        raise ValueError("invalid snapshot")
+    magic, version, big_endian, point_size, owner_size, signed, config_size, numpoints = (
+        _header.unpack_from(buf)
+    )
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("invalid snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError("unsupported snapshot version {}".format(version))
+    if big_endian != (sys.byteorder == "big"):
+        raise ValueError("snapshot byte order does not match")
+    if owner_size not in _owner_formats:
+        raise ValueError("invalid snapshot")
+    # the buffer may be larger (like a shared memory segment) but not shorter
+    points_size = numpoints * point_size
+    size = _header.size + config_size + _padding(config_size)
+    size += points_size + _padding(points_size) + numpoints * owner_size
+    if len(buf) < size:
+        raise ValueError("invalid snapshot")
+
+    offset = _header.size
+    config = json.loads(bytes(buf[offset : offset + config_size]).decode("utf-8"))
+    offset += config_size + _padding(config_size)
+
+    points = buf[offset : offset + points_size]
+    offset += len(points) + _padding(len(points))
+    if point_size in _point_formats:
+        keys = points.cast(_point_formats[point_size])
+    else:
+        keys = [
+            int.from_bytes(points[i : i + point_size], sys.byteorder, signed=bool(signed))
+            for i in range(0, len(points), point_size)
+        ]
+    owners = buf[offset : offset + numpoints * owner_size].cast(_owner_formats[owner_size])
+    return config, keys, CompactRing(keys, owners, config["names"], config["size"])
+
+
+def restore_runtime(runtime, config, keys, ring):
+    """Set the nodes and continuum of the given runtime from a snapshot.
+
+    :param runtime: the MetaRing or KetamaRing to restore.
+    :param config: the snapshot configuration dict.
+    :param keys: the sorted points of the continuum.
+    :param ring: the point to node name mapping of the continuum.
+    """
+    runtime._nodes.update((nodename, conf) for nodename, conf in config["nodes"])
+    if "ks" in config:
+        runtime._ks = dict(config["ks"])
+        runtime._set_weight_sum()
+    runtime._publish(keys, ring, Counter(dict(config["distribution"])))